@@ -0,0 +1,60 @@
+import argparse
+import json
+import time
+
+from bench.synthetic import synthetic_recording
+from recordformat import CHUNK_EVENTS, CODECS, MOVE, decode_chunk, encode_chunk
+
+
+def legacy_json(recording):
+    events = recording.events
+    dicts = []
+    for event_type, x, y, button, pressed, ts in events.iter_events():
+        event = {'type': event_type, 'x': x, 'y': y, 'ts': recording.created + ts // 1000000}
+        if event_type != MOVE:
+            event['button'] = button
+            event['pressed'] = bool(pressed)
+        dicts.append(event)
+    return json.dumps({'name': recording.name, 'description': recording.description, 'events': dicts},
+                      indent=True).encode('utf-8')
+
+
+def measure(recording, repeat=3):
+    count = len(recording.events)
+    results = {}
+
+    data = legacy_json(recording)
+    best = min(_timed(lambda: json.loads(data.decode('utf-8'))) for _ in range(repeat))
+    results['json'] = {'bytes': len(data), 'decode_events_per_sec': count / best}
+
+    for name, codec in sorted(CODECS.items(), key=lambda item: item[1]):
+        chunks = [encode_chunk(recording.events.slice(start, start + CHUNK_EVENTS), codec)
+                  for start in range(0, count, CHUNK_EVENTS)]
+        best = min(_timed(lambda: [decode_chunk(chunk) for chunk in chunks]) for _ in range(repeat))
+        results[name] = {'bytes': sum(len(chunk) for chunk in chunks), 'decode_events_per_sec': count / best}
+
+    for result in results.values():
+        result['ratio'] = results['json']['bytes'] / result['bytes']
+    return results
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare recording storage layouts')
+    parser.add_argument('--events', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    results = measure(synthetic_recording(args.events))
+    print('{:<6} {:>12} {:>8} {:>16}'.format('layout', 'bytes', 'ratio', 'decode events/s'))
+    for name, result in results.items():
+        print('{:<6} {:>12} {:>7.1f}x {:>16,.0f}'.format(name, result['bytes'], result['ratio'],
+                                                       result['decode_events_per_sec']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import array
+import enum
+import time
+
+from inputbackend import InputBackend
+from recordformat import MOVE
+
+
+class Button(enum.Enum):
+    unknown = 0
+    left = 1
+    middle = 2
+    right = 3
+
+
+class FakeListener(object):
+    def __init__(self, recording, on_move=None, on_click=None, on_scroll=None):
+        self.recording = recording
+        self.on_move = on_move
+        self.on_click = on_click
+        self.count = 0
+        self.stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+    def join(self):
+        on_move = self.on_move
+        on_click = self.on_click
+        x = y = 0
+        if self.recording is not None:
+            for event_type, x, y, button, pressed, _ in self.recording.events.iter_events():
+                if self.stopped:
+                    return
+                self.count += 1
+                if event_type == MOVE:
+                    result = on_move(x, y)
+                else:
+                    result = on_click(x, y, Button(button), bool(pressed))
+                if result is False:
+                    return
+        if not self.stopped:
+            on_click(x, y, Button.middle, True)
+
+
+class FakeController(object):
+    MOVE = 0
+    PRESS = 1
+    RELEASE = 2
+
+    def __init__(self):
+        self.position = (0, 0)
+        self.times = array.array('q')
+        self.calls = array.array('B')
+
+    def move(self, dx, dy):
+        self.times.append(time.monotonic_ns())
+        self.calls.append(FakeController.MOVE)
+        self.position = (self.position[0] + dx, self.position[1] + dy)
+
+    def press(self, button):
+        self.times.append(time.monotonic_ns())
+        self.calls.append(FakeController.PRESS)
+
+    def release(self, button):
+        self.times.append(time.monotonic_ns())
+        self.calls.append(FakeController.RELEASE)
+
+
+class FakeMouse(object):
+    Button = Button
+
+    def __init__(self, recording=None):
+        self.recording = recording
+        self.controllers = []
+
+    def Listener(self, on_move=None, on_click=None, on_scroll=None):
+        return FakeListener(self.recording, on_move, on_click, on_scroll)
+
+    def Controller(self):
+        controller = FakeController()
+        self.controllers.append(controller)
+        return controller
+
+
+def fake_backend(recording=None):
+    mouse = FakeMouse(recording)
+    return InputBackend(mouse), mouse
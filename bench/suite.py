@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from bench.fakeinput import fake_backend
+from bench.synthetic import synthetic_recording
+from engine import Recorder
+from inputworker import InputWorker, RecordJob, play_job
+from measure import peak_rss, percentile
+from plancache import PlanCache
+from playback import compile_plan
+from recordformat import EXTENSION, MOVE, RecordingReader, save_recording
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+PLAYBACK_EVENTS = 2000
+FIRST_EVENT_REPEATS = 5
+
+
+def expected_calls(plan):
+    deadlines = []
+    for chunk in plan.iter_chunks():
+        for kind, dx, dy, deadline in zip(chunk.kind, chunk.dx, chunk.dy, chunk.deadline):
+            if dx or dy:
+                deadlines.append(deadline)
+            if kind != MOVE:
+                deadlines.append(deadline)
+    return deadlines
+
+
+def compile_all(file_name, backend):
+    plan = compile_plan(file_name, backend.buttons, backend.Button.middle)
+    for _ in plan.iter_chunks():
+        pass
+    return plan
+
+
+def bench_record(count):
+    recording = synthetic_recording(count)
+    backend, _ = fake_backend(recording)
+    recorder = Recorder(recording.name, recording.description, backend)
+    worker = InputWorker(backend)
+    worker.submit(RecordJob(recorder))
+    worker.finish()
+
+    start = time.perf_counter()
+    worker.run()
+    record_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    file_name = recorder.stop()
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with RecordingReader(file_name) as reader:
+        if reader.chunks:
+            reader.chunk(0)
+        first_event_time = time.perf_counter() - start
+        stored = len(reader)
+    compile_all(file_name, backend)
+    load_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    compile_all(file_name, backend)
+    load_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    cache = PlanCache()
+    start = time.perf_counter()
+    plan = cache.load(file_name, backend.buttons, backend.Button.middle)
+    miss_load_time = time.perf_counter() - start
+    for _ in plan.iter_chunks():
+        pass
+    plan.close()
+    start = time.perf_counter()
+    plan = cache.load(file_name, backend.buttons, backend.Button.middle)
+    cached_load_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in plan.iter_chunks():
+        pass
+    cached_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    plan.close()
+
+    return {'events': count,
+            'stored_events': stored,
+            'ring_overflows': recorder.ring.overflows,
+            'ring_click_overflows': recorder.ring.click_overflows,
+            'record_events_per_sec': count / record_time,
+            'save_seconds': save_time,
+            'file_bytes': os.path.getsize(file_name),
+            'first_event_seconds': first_event_time,
+            'load_seconds': load_time,
+            'load_peak_alloc_bytes': load_peak,
+            'miss_load_seconds': miss_load_time,
+            'cached_load_seconds': cached_load_time,
+            'cached_read_peak_alloc_bytes': cached_peak,
+            'peak_rss_bytes': peak_rss()}
+
+
+def bench_playback(count):
+    recording = synthetic_recording(count, seed=1)
+    file_name = 'playback' + EXTENSION
+    save_recording(recording, file_name)
+
+    backend, mouse_backend = fake_backend()
+    worker = InputWorker(backend, PlanCache())
+    job = worker.submit(play_job([{'name': recording.name, 'description': recording.description,
+                                   'file_name': file_name}]))
+    worker.finish()
+    worker.run()
+
+    controller = mouse_backend.controllers[-1]
+    scheduler = job.playlist.played[0][2]
+    expected = expected_calls(compile_plan(file_name, backend.buttons, backend.Button.middle))
+    errors = sorted((actual - scheduler.start - deadline) / 1000.0
+                    for actual, deadline in zip(controller.times, expected))
+    return {'events': count,
+            'injected_calls': len(controller.times),
+            'error_us_p50': percentile(errors, 0.5),
+            'error_us_p90': percentile(errors, 0.9),
+            'error_us_p99': percentile(errors, 0.99),
+            'error_us_max': errors[-1] if errors else 0,
+            'end_lateness_us': scheduler.last_lateness / 1000.0}
+
+
+def bench_first_event(count, backend=None, repeats=FIRST_EVENT_REPEATS):
+    recording = synthetic_recording(count, seed=2)
+    record = {'name': recording.name, 'description': recording.description, 'file_name': 'first_event' + EXTENSION}
+    save_recording(recording, record['file_name'])
+    if backend is None:
+        backend, _ = fake_backend()
+
+    # Cold: a new thread and a new backend connection for every playback, as MouseThread used to do
+    cold = []
+    for _ in range(repeats):
+        worker = InputWorker(backend, PlanCache())
+        job = worker.submit(play_job([record]))
+        worker.finish()
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        thread.join()
+        cold.append(job.first_event_ns / 1e6)
+
+    warm = []
+    done = threading.Event()
+    worker = InputWorker(backend, PlanCache())
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    worker.submit(play_job([record], lambda job: done.set()))
+    done.wait()
+    for _ in range(repeats):
+        done.clear()
+        job = worker.submit(play_job([record], lambda job: done.set()))
+        done.wait()
+        warm.append(job.first_event_ns / 1e6)
+    worker.finish()
+    thread.join()
+
+    return {'events': count,
+            'cold_ms_median': percentile(sorted(cold), 0.5),
+            'cold_ms_max': max(cold),
+            'warm_ms_median': percentile(sorted(warm), 0.5),
+            'warm_ms_max': max(warm)}
+
+
+def run(sizes, playback_events, first_event_backend=None):
+    results = {'meta': {'python': platform.python_version(),
+                        'platform': platform.platform(),
+                        'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+               'record': {},
+               'playback': None,
+               'first_event': None}
+    for count in sizes:
+        results['record'][str(count)] = bench_record(count)
+        print('record {}: {}'.format(count, json.dumps(results['record'][str(count)])), flush=True)
+    if playback_events:
+        results['playback'] = bench_playback(playback_events)
+        print('playback {}: {}'.format(playback_events, json.dumps(results['playback'])), flush=True)
+        results['first_event'] = bench_first_event(playback_events, first_event_backend)
+        print('first event: {}'.format(json.dumps(results['first_event'])), flush=True)
+    return results
+
+
+def compare(current, baseline):
+    rows = []
+    for section in ('record', 'playback', 'first_event'):
+        old_section = baseline.get(section) or {}
+        new_section = current.get(section) or {}
+        if section != 'record':
+            old_section, new_section = {'': old_section}, {'': new_section}
+        for size, new in sorted(new_section.items()):
+            old = old_section.get(size) or {}
+            for metric, value in sorted(new.items()):
+                if isinstance(value, (int, float)) and old.get(metric):
+                    rows.append((section, size, metric, old[metric], value, value / old[metric]))
+    for row in rows:
+        print('{:<9}{:>9} {:<24}{:>16.4g}{:>16.4g}{:>8.2f}x'.format(*row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark recording, saving, loading and playback')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--playback-events', type=int, default=PLAYBACK_EVENTS)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--first-event-backend', choices=('fake', 'pynput'), default='fake',
+                        help='input backend for the cold and warm time to first event')
+    args = parser.parse_args(argv)
+
+    first_event_backend = None
+    if args.first_event_backend == 'pynput':
+        from inputbackend import pynput_backend
+        first_event_backend = pynput_backend()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix='cobalt_bench_')
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        results = run(args.sizes, args.playback_events, first_event_backend)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=True)
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
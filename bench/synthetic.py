@@ -0,0 +1,29 @@
+import random
+
+from recordformat import BUTTON_LEFT, BUTTON_RIGHT, Recording
+
+MOVE_INTERVAL_NS = 1000000
+CLICK_EVERY = 2000
+
+
+def synthetic_recording(count, seed=0, interval_ns=MOVE_INTERVAL_NS, click_every=CLICK_EVERY):
+    rng = random.Random(seed)
+    recording = Recording('synthetic_{}'.format(count), 'Synthetic recording', created=1500000000000)
+    events = recording.events
+    x, y = 960, 540
+    vx, vy = 0.0, 0.0
+    ts = 0
+    while len(events) < count:
+        ts += interval_ns + rng.randint(-20000, 20000)
+        if len(events) % click_every == click_every - 2 and len(events) + 2 <= count:
+            button = BUTTON_LEFT if rng.random() < 0.8 else BUTTON_RIGHT
+            events.append_click(x, y, button, True, ts)
+            ts += rng.randint(50, 150) * 1000000
+            events.append_click(x, y, button, False, ts)
+            continue
+        vx = max(-12.0, min(12.0, vx + rng.uniform(-1.5, 1.5)))
+        vy = max(-12.0, min(12.0, vy + rng.uniform(-1.5, 1.5)))
+        x = max(0, min(1919, int(x + vx)))
+        y = max(0, min(1079, int(y + vy)))
+        events.append_move(x, y, ts)
+    return recording
@@ -0,0 +1,51 @@
+class CapturePolicy(object):
+    def __init__(self, max_rate=0, min_distance=0, min_interval_ms=0):
+        self.max_rate = max_rate
+        self.min_distance = min_distance
+        self.min_interval_ms = min_interval_ms
+        self.min_gap_ns = max(int(min_interval_ms * 1000000), 1000000000 // max_rate if max_rate > 0 else 0)
+        self.min_distance_sq = min_distance * min_distance
+        self.kept = 0
+        self.dropped = 0
+        self.merged = 0
+        self.clicks = 0
+        self.pending = None
+        self.last_x = None
+        self.last_y = 0
+        self.last_ts = 0
+
+    def keep_move(self, x, y, ts):
+        last_x = self.last_x
+        if last_x is not None and (ts - self.last_ts < self.min_gap_ns or
+                                   (x - last_x) ** 2 + (y - self.last_y) ** 2 < self.min_distance_sq):
+            self.pending = (x, y, ts)
+            self.dropped += 1
+            return False
+        self.pending = None
+        self.last_x = x
+        self.last_y = y
+        self.last_ts = ts
+        self.kept += 1
+        return True
+
+    def take_pending(self):
+        # The latest dropped move is kept after all when something has to follow it, so the path ends where it did
+        pending = self.pending
+        if pending is not None:
+            self.pending = None
+            self.dropped -= 1
+            self.merged += 1
+            self.kept += 1
+        return pending
+
+    def click(self, x, y, ts):
+        self.clicks += 1
+        self.last_x = x
+        self.last_y = y
+        self.last_ts = ts
+
+
+def policy_summary(policy):
+    total = policy.kept + policy.dropped
+    return 'Движений сохранено: {} из {} ({:.1f}%), отброшено: {}, нажатий: {}'.format(
+        policy.kept, total, 100.0 * policy.kept / total if total else 100.0, policy.dropped, policy.clicks)
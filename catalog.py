@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import sqlite3
+
+from recordformat import FormatError, RecordingReader
+
+CATALOG_FILE = 'records.db'
+LEGACY_CATALOG_FILE = 'records.json'
+SCHEMA_VERSION = 3
+# Pages the write-ahead log may grow to before it is folded back, this bounds recovery work on open
+WAL_CHECKPOINT_PAGES = 256
+WAL_SIZE_LIMIT = 4 * 1024 * 1024
+
+DURATION_BUCKETS = ((10 * 10 ** 9, 'short'),
+                    (60 * 10 ** 9, 'medium'),
+                    (600 * 10 ** 9, 'long'))
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    file_name TEXT NOT NULL,
+    created INTEGER NOT NULL DEFAULT 0,
+    duration INTEGER NOT NULL DEFAULT 0,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    click_count INTEGER NOT NULL DEFAULT 0,
+    tags TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS records_name ON records (name);
+CREATE INDEX IF NOT EXISTS records_description ON records (description);
+CREATE INDEX IF NOT EXISTS records_created ON records (created);
+CREATE INDEX IF NOT EXISTS records_duration ON records (duration);
+CREATE INDEX IF NOT EXISTS records_event_count ON records (event_count);
+'''
+
+_FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(
+    name, description, tags, content='records', content_rowid='id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS records_fts_insert AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts (rowid, name, description, tags) VALUES (new.id, new.name, new.description, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS records_fts_delete AFTER DELETE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, name, description, tags)
+    VALUES ('delete', old.id, old.name, old.description, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS records_fts_update AFTER UPDATE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, name, description, tags)
+    VALUES ('delete', old.id, old.name, old.description, old.tags);
+    INSERT INTO records_fts (rowid, name, description, tags) VALUES (new.id, new.name, new.description, new.tags);
+END;
+'''
+
+
+def recording_stats(file_name):
+    if not os.path.isfile(file_name):
+        return 0, 0, 0, 0
+    try:
+        with RecordingReader(file_name) as reader:
+            # Moves are never pressed, so the pressed column counts the clicks themselves and not their releases
+            clicks = sum(chunk.pressed.count(1) for chunk in reader.iter_chunks())
+            return reader.created, reader.duration(), len(reader), clicks
+    except (FormatError, OSError, ValueError, KeyError):
+        return 0, 0, 0, 0
+
+
+def record_tags(duration, click_count):
+    bucket = next((tag for limit, tag in DURATION_BUCKETS if duration < limit), 'huge')
+    clicks = 'noclicks' if click_count == 0 else 'fewclicks' if click_count < 10 else 'manyclicks'
+    return '{} {} clicks{}'.format(bucket, clicks, click_count)
+
+
+def fts_query(text):
+    return ' '.join('"{}"*'.format(term) for term in re.findall(r'\w+', text))
+
+
+def _like_clause(text):
+    if not text:
+        return '', ()
+    pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return " WHERE (name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')", (pattern, pattern)
+
+
+class RecordCatalog(object):
+    def __init__(self, path=CATALOG_FILE, legacy_path=LEGACY_CATALOG_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        # Every change is one append to the log and one fsync, the main file is only rewritten by checkpoints
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = FULL')
+        self.connection.execute('PRAGMA wal_autocheckpoint = {}'.format(WAL_CHECKPOINT_PAGES))
+        self.connection.execute('PRAGMA journal_size_limit = {}'.format(WAL_SIZE_LIMIT))
+
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        columns = set(row[1] for row in self.connection.execute('PRAGMA table_info(records)'))
+        if columns and 'tags' not in columns:
+            with self.connection:
+                self.connection.execute('ALTER TABLE records ADD COLUMN click_count INTEGER NOT NULL DEFAULT 0')
+                self.connection.execute("ALTER TABLE records ADD COLUMN tags TEXT NOT NULL DEFAULT ''")
+        self.connection.executescript(_SCHEMA)
+
+        if version < SCHEMA_VERSION:
+            with self.connection:
+                # Rows of version 1 catalogs are left without tags, their stats are filled in like imported ones
+                if version == 0 and legacy_path is not None and os.path.isfile(legacy_path):
+                    self._import_json(legacy_path)
+                # Version 2 counted both the press and the release of a click, the saver counts the rows again
+                if version == 2:
+                    self.connection.execute("UPDATE records SET tags = ''")
+                self.connection.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+        self.fts = self._create_fts()
+
+    def _create_fts(self):
+        exists = self.connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'records_fts'").fetchone()[0]
+        if exists:
+            return True
+        try:
+            self.connection.executescript('BEGIN;' + _FTS_SCHEMA +
+                                          "INSERT INTO records_fts (records_fts) VALUES ('rebuild'); COMMIT;")
+        except sqlite3.OperationalError:
+            self.connection.rollback()
+            return False
+        return True
+
+    def _import_json(self, legacy_path):
+        with open(legacy_path, 'r') as f:
+            records = json.load(f)
+        # Decoding every recording for its stats would freeze the tray on first start, rows without tags get
+        # their stats later from the saver thread or from cobalt migrate
+        self.connection.executemany('INSERT INTO records (name, description, file_name) VALUES (?, ?, ?)',
+                                    ((record['name'], record['description'], record['file_name'])
+                                     for record in records))
+
+    def _insert(self, name, description, file_name, stats=None):
+        created, duration, event_count, click_count = stats if stats is not None else recording_stats(file_name)
+        cursor = self.connection.execute(
+            'INSERT INTO records (name, description, file_name, created, duration, event_count, click_count, tags) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (name, description, file_name, created, duration, event_count, click_count,
+             record_tags(duration, click_count)))
+        return cursor.lastrowid
+
+    def add(self, name, description, file_name, stats=None):
+        with self.connection:
+            record_id = self._insert(name, description, file_name, stats)
+        return self.get(record_id)
+
+    def pending_stats(self):
+        # Legacy JSON rows are parsed in one go and get their stats from ``cobalt migrate`` instead
+        return self.connection.execute("SELECT id, file_name FROM records WHERE tags = '' "
+                                       "AND file_name NOT LIKE '%.json' ORDER BY id").fetchall()
+
+    def update_stats(self, record_id, stats):
+        created, duration, event_count, click_count = stats
+        with self.connection:
+            self.connection.execute(
+                'UPDATE records SET created = ?, duration = ?, event_count = ?, click_count = ?, tags = ? '
+                'WHERE id = ?', (created, duration, event_count, click_count, record_tags(duration, click_count),
+                                 record_id))
+
+    def legacy_files(self):
+        return self.connection.execute("SELECT id, file_name FROM records WHERE file_name LIKE '%.json'").fetchall()
+
+    def update_files(self, updates):
+        with self.connection:
+            for record_id, file_name, (created, duration, event_count, click_count) in updates:
+                self.connection.execute(
+                    'UPDATE records SET file_name = ?, created = ?, duration = ?, event_count = ?, click_count = ?, '
+                    'tags = ? WHERE id = ?', (file_name, created, duration, event_count, click_count,
+                                              record_tags(duration, click_count), record_id))
+
+    def get(self, record_id):
+        row = self.connection.execute('SELECT * FROM records WHERE id = ?', (record_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def records(self, offset=0, limit=-1, text=''):
+        query = fts_query(text) if self.fts else ''
+        if query:
+            rows = self.connection.execute(
+                'SELECT records.* FROM records_fts JOIN records ON records.id = records_fts.rowid '
+                'WHERE records_fts MATCH ? ORDER BY records_fts.rowid LIMIT ? OFFSET ?', (query, limit, offset))
+        else:
+            where, args = _like_clause(text)
+            rows = self.connection.execute('SELECT * FROM records' + where + ' ORDER BY id LIMIT ? OFFSET ?',
+                                           args + (limit, offset))
+        return [dict(row) for row in rows]
+
+    def matches(self, record_id, text):
+        query = fts_query(text) if self.fts else ''
+        if query:
+            row = self.connection.execute('SELECT 1 FROM records_fts WHERE records_fts MATCH ? AND rowid = ?',
+                                          (query, record_id)).fetchone()
+        else:
+            where, args = _like_clause(text)
+            row = self.connection.execute('SELECT 1 FROM records' + (where + ' AND' if where else ' WHERE') +
+                                          ' id = ?', args + (record_id,)).fetchone()
+        return row is not None
+
+    def checkpoint(self):
+        busy, log_pages, checkpointed = self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        return not busy
+
+    def snapshot(self, file_name):
+        temp_file_name = file_name + '.tmp'
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        target = sqlite3.connect(temp_file_name)
+        try:
+            self.connection.backup(target)
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+        with open(temp_file_name, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_file_name, file_name)
+        if hasattr(os, 'O_DIRECTORY'):
+            directory = os.open(os.path.dirname(os.path.abspath(file_name)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def close(self):
+        self.checkpoint()
+        self.connection.close()
+
+
+def print_records(catalog, query='', limit=-1):
+    for record in catalog.records(0, limit, query):
+        print('{id}\t{name}\t{description}\t{file_name}\t{tags}'.format(**record))
@@ -0,0 +1,272 @@
+import argparse
+import os
+import re
+import sys
+
+NAME_RE = re.compile(r'[_a-zA-Z0-9]+$')
+
+
+def resolve_records(targets, catalog_file):
+    catalog = None
+    records = []
+    for target in targets:
+        if target.isdigit() and not os.path.isfile(target):
+            if catalog is None:
+                from catalog import RecordCatalog
+                catalog = RecordCatalog(catalog_file)
+            record = catalog.get(int(target))
+            if record is None:
+                raise SystemExit('No record with id {}'.format(target))
+            records.append(record)
+        else:
+            records.append({'name': os.path.basename(target), 'description': '', 'file_name': target})
+    if catalog is not None:
+        catalog.close()
+    return records
+
+
+def command_record(args):
+    from capturepolicy import CapturePolicy, policy_summary
+    from engine import Recorder
+    from inputbackend import pynput_backend
+    from simplify import simplify_summary
+
+    if not NAME_RE.match(args.name):
+        raise SystemExit('Record name may only contain latin letters, digits and underscores')
+
+    recorder = Recorder(args.name, args.description, pynput_backend(),
+                        policy=CapturePolicy(args.max_rate, args.min_distance, args.min_interval),
+                        simplify_epsilon=args.simplify, memory_limit=args.memory_limit * 1024 * 1024)
+    recorder.start(args.output)
+    print('Recording {}, middle click to stop'.format(recorder.writer.file_name), file=sys.stderr)
+    recorder.listen()
+    try:
+        file_name = recorder.stop()
+    except OSError as e:
+        raise SystemExit('Recording {} is incomplete, writing it failed: {}'.format(recorder.writer.file_name, e))
+    print(policy_summary(recorder.policy), file=sys.stderr)
+    print('Dropped moves: {}, dropped clicks: {}, disk stalls: {}'.format(
+        recorder.ring.overflows, recorder.ring.click_overflows, recorder.writer.stalls), file=sys.stderr)
+    if recorder.simplified is not None:
+        print(simplify_summary(*recorder.simplified), file=sys.stderr)
+
+    if not args.no_catalog:
+        from catalog import RecordCatalog
+        catalog = RecordCatalog(args.catalog)
+        catalog.add(args.name, args.description, file_name)
+        catalog.close()
+    print(file_name)
+
+
+def command_play(args):
+    from inputbackend import pynput_backend
+    from playback import PlaybackOptions, format_duration
+    from playlist import PlaylistPlayer, playlist_item, playlist_summary, read_playlist
+    from timingreport import report_summary
+
+    try:
+        options = PlaybackOptions(args.speed, args.max_gap * 1000, args.fast, args.settle)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    entries = [(target, args.loops, args.delay) for target in args.records]
+    if args.playlist:
+        entries.extend(read_playlist(args.playlist))
+    if not entries:
+        raise SystemExit('Nothing to play, give record ids, file names or --playlist')
+    records = resolve_records([target for target, _, _ in entries], args.catalog)
+    items = [playlist_item(record, loops, delay_ms) for record, (_, loops, delay_ms) in zip(records, entries)]
+
+    playlist = PlaylistPlayer(items * args.repeat, pynput_backend(), options=options)
+    try:
+        expected, exact = playlist.expected_duration()
+        if expected is None:
+            print('Expected duration unknown', file=sys.stderr)
+        else:
+            print('Expected duration {}{}'.format('' if exact else 'at most ', format_duration(expected)),
+                  file=sys.stderr)
+        playlist.play()
+        for file_name, player in playlist.players.items():
+            if player.plan is None:
+                print('{}: nothing to play'.format(file_name), file=sys.stderr)
+        for item, timing in playlist.reports():
+            if not args.quiet:
+                print('{}: {}'.format(item.file_name, report_summary(timing)))
+    finally:
+        playlist.close()
+    if not args.quiet:
+        print(playlist_summary(playlist))
+
+
+def command_list(args):
+    from catalog import RecordCatalog, print_records
+
+    catalog = RecordCatalog(args.catalog)
+    print_records(catalog, ' '.join(args.query), args.limit)
+    catalog.close()
+
+
+def command_convert(args):
+    from recordformat import CODECS, EXTENSION, load_recording, save_recording
+
+    if args.output is not None and len(args.files) != 1:
+        raise SystemExit('--output can only be used with a single input file')
+    for source in args.files:
+        target = args.output or os.path.splitext(source)[0] + EXTENSION
+        temp_target = target + '.tmp'
+        save_recording(load_recording(source), temp_target, CODECS[args.codec])
+        os.replace(temp_target, target)
+        print('{} -> {} ({} -> {} bytes)'.format(source, target, os.path.getsize(source), os.path.getsize(target)))
+
+
+def command_migrate(args):
+    from catalog import RecordCatalog
+    from migrate import Migration, migration_summary
+    from recordformat import CODECS
+
+    def progress(migration, total):
+        print('{}/{} converted'.format(migration.converted, total), file=sys.stderr)
+
+    catalog = None if args.no_catalog else RecordCatalog(args.catalog)
+    try:
+        migration = Migration(args.directory, catalog, args.jobs, CODECS[args.codec], args.delete_source)
+        try:
+            migration.run(None if args.quiet else progress)
+        except KeyboardInterrupt:
+            print('interrupted, run again to continue', file=sys.stderr)
+    finally:
+        if catalog is not None:
+            catalog.close()
+    for source, error in migration.failed:
+        print('{}: {}'.format(source, error), file=sys.stderr)
+    print(migration_summary(migration))
+
+
+def command_simplify(args):
+    from catalog import RecordCatalog, recording_stats
+    from recordformat import CODECS
+    from simplify import simplify_file, simplify_summary
+
+    catalog = RecordCatalog(args.catalog)
+    records = [catalog.get(int(record_id)) for record_id in args.records] if args.records else catalog.records()
+    total_events = total_removed = 0
+    deviation = 0.0
+    updates = []
+    for record in records:
+        if record is None:
+            continue
+        file_name = record['file_name']
+        try:
+            events, removed, record_deviation = simplify_file(file_name, args.epsilon, CODECS[args.codec])
+        except (OSError, ValueError) as e:
+            print('{}: {}'.format(record['id'], e), file=sys.stderr)
+            continue
+        total_events += events
+        total_removed += removed
+        deviation = max(deviation, record_deviation)
+        if removed:
+            updates.append((record['id'], file_name, recording_stats(file_name)))
+        if not args.quiet:
+            print('{}\t{}\t{}'.format(record['id'], file_name, simplify_summary(events, removed, record_deviation)))
+    catalog.update_files(updates)
+    catalog.close()
+    print(simplify_summary(total_events, total_removed, deviation))
+
+
+def command_backup(args):
+    from catalog import RecordCatalog
+
+    catalog = RecordCatalog(args.catalog)
+    try:
+        complete = catalog.checkpoint()
+        catalog.snapshot(args.output or args.catalog + '.bak')
+    finally:
+        catalog.close()
+    if not complete:
+        print('the log is in use by another process and was only partly folded back', file=sys.stderr)
+
+
+def command_bench(args):
+    from bench.suite import main
+    main(args.extra)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='cobalt', description='Record and replay mouse input without the tray')
+    parser.add_argument('--catalog', default='records.db', help='record catalog database')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    record = commands.add_parser('record', help='record until the middle mouse button is pressed')
+    record.add_argument('name')
+    record.add_argument('--description', default='')
+    record.add_argument('--output', help='recording file name')
+    record.add_argument('--no-catalog', action='store_true', help='do not add the recording to the catalog')
+    record.add_argument('--max-rate', type=int, default=0, help='maximum moves per second, 0 keeps every move')
+    record.add_argument('--min-distance', type=int, default=0, help='minimum pointer travel in pixels between moves')
+    record.add_argument('--min-interval', type=float, default=0, help='minimum time between moves in milliseconds')
+    record.add_argument('--memory-limit', type=int, default=32, metavar='MB',
+                        help='memory for buffered events, past it the recorder waits for the disk or drops events')
+    record.add_argument('--simplify', type=float, default=0, metavar='PIXELS',
+                        help='drop moves that keep the path within this error after saving, 0 keeps them all')
+    record.set_defaults(function=command_record)
+
+    play = commands.add_parser('play', help='play records by catalog id or file name')
+    play.add_argument('records', nargs='*')
+    play.add_argument('--playlist', help='JSON list of ids or files, or of {"record", "loops", "delay_ms"} objects')
+    play.add_argument('--loops', type=int, default=1, help='times to play each record in a row')
+    play.add_argument('--delay', type=int, default=0, help='pause before each record in milliseconds')
+    play.add_argument('--repeat', type=int, default=1, help='times to play the whole list')
+    play.add_argument('--speed', type=float, default=1.0, help='playback speed factor, 0.25 to 20')
+    play.add_argument('--max-gap', type=float, default=0, metavar='SECONDS',
+                      help='shorten any pause between two events to at most this, 0 keeps them')
+    play.add_argument('--fast', action='store_true',
+                      help='send events back to back, pausing only around presses and releases')
+    play.add_argument('--settle', type=int, default=15, metavar='MS',
+                      help='pause around presses and releases with --fast')
+    play.add_argument('--quiet', action='store_true')
+    play.set_defaults(function=command_play)
+
+    list_records = commands.add_parser('list', help='list or search the catalog')
+    list_records.add_argument('query', nargs='*')
+    list_records.add_argument('--limit', type=int, default=-1)
+    list_records.set_defaults(function=command_list)
+
+    convert = commands.add_parser('convert', help='convert recordings to the current format')
+    convert.add_argument('files', nargs='+')
+    convert.add_argument('--output')
+    convert.add_argument('--codec', choices=('raw', 'zlib', 'lzma'), default='zlib')
+    convert.set_defaults(function=command_convert)
+
+    migrate = commands.add_parser('migrate', help='convert legacy JSON recordings in parallel, resumable')
+    migrate.add_argument('directory', nargs='?', default='.')
+    migrate.add_argument('--jobs', type=int, help='worker processes, defaults to the number of CPUs')
+    migrate.add_argument('--codec', choices=('raw', 'zlib', 'lzma'), default='zlib')
+    migrate.add_argument('--delete-source', action='store_true', help='remove JSON files once converted')
+    migrate.add_argument('--no-catalog', action='store_true', help='do not update catalog entries')
+    migrate.add_argument('--quiet', action='store_true')
+    migrate.set_defaults(function=command_migrate)
+
+    simplify = commands.add_parser('simplify', help='drop redundant moves from catalog recordings in place')
+    simplify.add_argument('records', nargs='*', help='catalog ids, all records when omitted')
+    simplify.add_argument('--epsilon', type=float, default=1.0, help='allowed path error in pixels')
+    simplify.add_argument('--codec', choices=('raw', 'zlib', 'lzma'), default='zlib')
+    simplify.add_argument('--quiet', action='store_true')
+    simplify.set_defaults(function=command_simplify)
+
+    backup = commands.add_parser('backup', help='fold the catalog log back and write an atomic snapshot')
+    backup.add_argument('--output', help='snapshot file, defaults to the catalog file name plus .bak')
+    backup.set_defaults(function=command_backup)
+
+    bench = commands.add_parser('bench', help='run the benchmark suite, see python -m bench --help',
+                                add_help=False)
+    bench.set_defaults(function=command_bench)
+
+    args, args.extra = parser.parse_known_args(argv)
+    if args.extra and args.function is not command_bench:
+        parser.error('unrecognized arguments: {}'.format(' '.join(args.extra)))
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import array
+import itertools
+import operator
+
+
+def deltas(values, order=1):
+    for _ in range(order):
+        values = list(map(operator.sub, values, itertools.chain((0,), values)))
+    return values
+
+
+def write_varints(values, out):
+    append = out.append
+    for value in values:
+        value = value << 1 if value >= 0 else ((-value) << 1) - 1
+        while value >= 0x80:
+            append((value & 0x7f) | 0x80)
+            value >>= 7
+        append(value)
+
+
+def read_varints(buf, offset, count):
+    values = []
+    append = values.append
+    for _ in range(count):
+        byte = buf[offset]
+        offset += 1
+        if byte < 0x80:
+            append((byte >> 1) ^ -(byte & 1))
+            continue
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = buf[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        append((value >> 1) ^ -(value & 1))
+    return values, offset
+
+
+def encode_columns(kind, x, y, button, pressed, ts):
+    out = bytearray()
+    out += kind.tobytes()
+    out += button.tobytes()
+    out += pressed.tobytes()
+    write_varints(deltas(x), out)
+    write_varints(deltas(y), out)
+    # Timestamps are nearly evenly spaced, so the second difference is mostly close to zero
+    write_varints(deltas(ts, 2), out)
+    return bytes(out)
+
+
+def decode_columns(buf, count):
+    offset = 0
+    columns = []
+    for _ in range(3):
+        columns.append(array.array('B', buf[offset:offset + count]))
+        offset += count
+    kind, button, pressed = columns
+
+    dx, offset = read_varints(buf, offset, count)
+    dy, offset = read_varints(buf, offset, count)
+    ddts, offset = read_varints(buf, offset, count)
+    x = array.array('i', itertools.accumulate(dx))
+    y = array.array('i', itertools.accumulate(dy))
+    ts = array.array('q', itertools.accumulate(itertools.accumulate(ddts)))
+    return kind, x, y, button, pressed, ts
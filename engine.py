@@ -0,0 +1,194 @@
+import os
+import time
+
+from capturepolicy import CapturePolicy
+from plancache import PlanCache
+from playback import play, retime
+from recordformat import BUTTON_UNKNOWN, EVENT_SIZE, recording_file_name
+from recordwriter import RecordingWriter
+from ringbuffer import RING_CAPACITY, EventRing, RingDrainer
+from scheduler import DeadlineScheduler
+from simplify import simplify_file
+from timingreport import timing_report, save_report
+
+MEMORY_LIMIT = 32 * 1024 * 1024
+MIN_MEMORY_LIMIT = 1024 * 1024
+
+
+def split_memory(memory_limit):
+    # A quarter goes to the ring and a quarter to the batch drained out of it, the writer queue gets the rest
+    if memory_limit < MIN_MEMORY_LIMIT:
+        raise ValueError('Recording memory limit must be at least {} bytes'.format(MIN_MEMORY_LIMIT))
+    capacity = min(RING_CAPACITY, 1 << ((memory_limit // 4 // EVENT_SIZE).bit_length() - 1))
+    return capacity, memory_limit - 2 * capacity * EVENT_SIZE
+
+
+class Recorder(object):
+    def __init__(self, name, description, backend, on_end=None, policy=None, simplify_epsilon=0,
+                 memory_limit=MEMORY_LIMIT):
+        self.name = name
+        self.description = description
+        self.backend = backend
+        self.on_end = on_end
+        self.policy = policy if policy is not None else CapturePolicy()
+        self.simplify_epsilon = simplify_epsilon
+        self.ring_capacity, self.writer_memory = split_memory(memory_limit)
+        self.simplified = None
+        self.writer = None
+        self.ring = None
+        self.drainer = None
+        self.listener = None
+        self.cancelled = False
+        self.start_ns = 0
+        self.dropped_presses = set()
+        self.unreleased = {}
+
+    def on_move(self, x, y):
+        ring = self.ring
+        if ring is not None:
+            ts = time.monotonic_ns() - self.start_ns
+            if self.unreleased:
+                self.push_unreleased(ts)
+            if self.policy.keep_move(x, y, ts):
+                ring.push_move(x, y, ts)
+
+    def on_click(self, x, y, button, pressed):
+        ring = self.ring
+        if ring is not None:
+            if button == self.backend.Button.middle and pressed:
+                self.flush_pending()
+                if self.on_end is not None:
+                    self.on_end()
+                return False
+            ts = time.monotonic_ns() - self.start_ns
+            if self.unreleased:
+                self.push_unreleased(ts)
+            self.flush_pending()
+            self.policy.click(x, y, ts)
+            self.push_click(x, y, self.backend.button_codes.get(button, BUTTON_UNKNOWN), pressed, ts)
+        if not pressed:
+            return True
+
+    def push_click(self, x, y, code, pressed, ts):
+        # A lost release would replay as a stuck button, so presses and releases are only ever dropped in pairs
+        if not pressed and code in self.dropped_presses:
+            self.dropped_presses.discard(code)
+            self.ring.click_overflows += 1
+            return
+        if self.ring.push_click(x, y, code, pressed, ts):
+            if pressed:
+                self.unreleased.pop(code, None)
+            return
+        if pressed:
+            self.dropped_presses.add(code)
+        else:
+            self.unreleased[code] = (x, y)
+
+    def push_unreleased(self, ts):
+        ring = self.ring
+        for code, (x, y) in list(self.unreleased.items()):
+            if len(ring) >= ring.capacity:
+                break
+            # Late but not lost, like a merged move of the capture policy
+            ring.push_click(x, y, code, False, ts)
+            ring.click_overflows -= 1
+            del self.unreleased[code]
+
+    def on_scroll(self, x, y, dx, dy):
+        pass
+
+    def start(self, file_name=None):
+        created = int(time.time() * 1000)
+        if file_name is None:
+            file_name = recording_file_name(self.name, time.strftime('%H_%M_%d_%m_%Y'))
+        self.writer = RecordingWriter(file_name, self.name, self.description, created,
+                                      memory_limit=self.writer_memory)
+        ring = EventRing(self.ring_capacity)
+        self.drainer = RingDrainer(ring, self.writer)
+        self.drainer.start()
+        self.start_ns = time.monotonic_ns()
+        self.ring = ring
+
+    def listen(self):
+        with self.backend.Listener(on_move=self.on_move, on_click=self.on_click,
+                                   on_scroll=self.on_scroll) as listener:
+            self.listener = listener
+            # A cancel that came before the listener existed had nothing to stop
+            if self.cancelled:
+                listener.stop()
+            listener.join()
+        self.listener = None
+
+    def cancel(self):
+        self.cancelled = True
+        listener = self.listener
+        if listener is not None:
+            listener.stop()
+
+    def flush_pending(self):
+        pending = self.policy.take_pending()
+        if pending is not None:
+            self.ring.push_move(*pending)
+
+    def finish(self):
+        self.flush_pending()
+        self.drainer.stop()
+        ts = time.monotonic_ns() - self.start_ns
+        for code, (x, y) in self.unreleased.items():
+            self.writer.append_click(x, y, code, False, ts)
+            self.ring.click_overflows -= 1
+        self.unreleased.clear()
+        self.writer.close()
+        return self.writer.file_name
+
+    def simplify(self):
+        if self.simplify_epsilon > 0:
+            self.simplified = simplify_file(self.writer.file_name, self.simplify_epsilon)
+        return self.simplified
+
+    def stats(self):
+        created, duration, event_count, click_count = self.writer.stats()
+        if self.simplified is not None:
+            event_count -= self.simplified[1]
+        return created, duration, event_count, click_count
+
+    def stop(self):
+        self.finish()
+        self.simplify()
+        return self.writer.file_name
+
+
+class Player(object):
+    def __init__(self, file_name, backend, plan_cache=None, options=None):
+        self.file_name = file_name
+        self.backend = backend
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.options = options
+        self.plan = None
+        self.scheduler = None
+        self.end = None
+        self.timing = None
+
+    def load(self):
+        if self.plan is None and os.path.isfile(self.file_name):
+            self.plan = retime(self.plan_cache.load(self.file_name, self.backend.buttons, self.backend.Button.middle),
+                               self.options)
+        return self.plan
+
+    def play(self, controller=None, start=None, cancelled=None):
+        if not self.load():
+            return None
+        self.scheduler = DeadlineScheduler(cancelled=cancelled)
+        self.end = play(self.plan, controller if controller is not None else self.backend.Controller(),
+                        self.scheduler, start)
+        return self.scheduler
+
+    def report(self, scheduler=None):
+        scheduler = scheduler if scheduler is not None else self.scheduler
+        self.timing = timing_report(self.plan.deadlines(), scheduler.lateness)
+        save_report(self.timing, self.file_name)
+        return self.timing
+
+    def close(self):
+        if self.plan is not None:
+            self.plan.close()
@@ -0,0 +1,22 @@
+from recordformat import BUTTON_LEFT, BUTTON_MIDDLE, BUTTON_RIGHT
+
+_pynput_backend = None
+
+
+class InputBackend(object):
+    def __init__(self, mouse):
+        self.Listener = mouse.Listener
+        self.Controller = mouse.Controller
+        self.Button = mouse.Button
+        self.button_codes = {mouse.Button.left: BUTTON_LEFT,
+                             mouse.Button.middle: BUTTON_MIDDLE,
+                             mouse.Button.right: BUTTON_RIGHT}
+        self.buttons = dict((code, button) for button, code in self.button_codes.items())
+
+
+def pynput_backend():
+    global _pynput_backend
+    if _pynput_backend is None:
+        from pynput import mouse
+        _pynput_backend = InputBackend(mouse)
+    return _pynput_backend
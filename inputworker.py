@@ -0,0 +1,129 @@
+import queue
+import time
+import traceback
+
+from plancache import PlanCache
+from playlist import PlaylistPlayer, playlist_item
+
+
+class PlayJob(object):
+    def __init__(self, items, on_done=None, options=None, on_start=None):
+        self.items = items
+        self.on_done = on_done
+        self.options = options
+        self.on_start = on_start
+        self.submitted = None
+        self.error = None
+        self.playlist = None
+        self.expected_ns = None
+        self.expected_exact = False
+        self.timings = []
+        self.first_event_ns = None
+        self.cancelled = False
+
+    def run(self, worker):
+        self.playlist = PlaylistPlayer(self.items, worker.backend, worker.plan_cache, self.options)
+        if self.cancelled:
+            self.playlist.cancel()
+        try:
+            if self.on_start is not None:
+                self.expected_ns, self.expected_exact = self.playlist.expected_duration()
+                self.on_start(self)
+            self.playlist.play(worker.controller)
+            if self.playlist.played and self.playlist.played[0][2].lateness:
+                scheduler = self.playlist.played[0][2]
+                self.first_event_ns = scheduler.start + scheduler.lateness[0] - self.submitted
+            self.timings = [timing for _, timing in self.playlist.reports()]
+        finally:
+            self.playlist.close()
+
+    def cancel(self):
+        self.cancelled = True
+        playlist = self.playlist
+        if playlist is not None:
+            playlist.cancel()
+
+
+class RecordJob(object):
+    def __init__(self, recorder, file_name=None, on_done=None):
+        self.recorder = recorder
+        self.file_name = file_name
+        self.on_done = on_done
+        self.submitted = None
+        self.error = None
+        self.cancelled = False
+
+    def run(self, worker):
+        self.recorder.start(self.file_name)
+        try:
+            self.recorder.listen()
+        except Exception:
+            # The writer and the drainer are already running, they are stopped before the error is reported
+            self.recorder.finish()
+            raise
+        if self.cancelled:
+            self.recorder.stop()
+
+    def cancel(self):
+        self.cancelled = True
+        self.recorder.cancel()
+
+
+def play_job(records, on_done=None, options=None, on_start=None):
+    return PlayJob([playlist_item(record) for record in records], on_done, options, on_start)
+
+
+class InputWorker(object):
+    def __init__(self, backend, plan_cache=None):
+        self.backend = backend
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.jobs = queue.Queue()
+        self.controller = None
+        self.current = None
+        self.stopping = False
+
+    def submit(self, job):
+        job.submitted = time.monotonic_ns()
+        self.jobs.put(job)
+        return job
+
+    def finish(self):
+        # The worker quits once the jobs already queued have run
+        self.jobs.put(None)
+
+    def stop(self):
+        # Jobs that have not started are dropped and the running one is cancelled, so quitting never waits for them
+        self.stopping = True
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancel()
+        self.jobs.put(None)
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def run(self):
+        # Connecting the injection backend is the slow part of a cold start, so it is done once per worker
+        if self.controller is None:
+            self.controller = self.backend.Controller()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.current = job
+            # A stop between taking the job and marking it current found nothing to cancel
+            if self.stopping:
+                job.cancel()
+            try:
+                job.run(self)
+            except Exception as e:
+                # A broken recording must not take the worker and its warm backend down with it
+                traceback.print_exc()
+                job.error = e
+            self.current = None
+            if job.on_done is not None:
+                job.on_done(job)
@@ -15,6 +15,95 @@ class Ui_MainWidget(object):
         icon = QtGui.QIcon()
         icon.addPixmap(QtGui.QPixmap(":/main/main.png"), QtGui.QIcon.Normal, QtGui.QIcon.Off)
         MainWidget.setWindowIcon(icon)
+        self.verticalLayout = QtWidgets.QVBoxLayout(MainWidget)
+        self.verticalLayout.setContentsMargins(11, 11, 11, 11)
+        self.verticalLayout.setSpacing(6)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.groupBoxCapture = QtWidgets.QGroupBox(MainWidget)
+        self.groupBoxCapture.setObjectName("groupBoxCapture")
+        self.formLayoutCapture = QtWidgets.QFormLayout(self.groupBoxCapture)
+        self.formLayoutCapture.setContentsMargins(11, 11, 11, 11)
+        self.formLayoutCapture.setSpacing(6)
+        self.formLayoutCapture.setObjectName("formLayoutCapture")
+        self.labelMaxRate = QtWidgets.QLabel(self.groupBoxCapture)
+        self.labelMaxRate.setObjectName("labelMaxRate")
+        self.formLayoutCapture.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.labelMaxRate)
+        self.spinBoxMaxRate = QtWidgets.QSpinBox(self.groupBoxCapture)
+        self.spinBoxMaxRate.setMaximum(10000)
+        self.spinBoxMaxRate.setObjectName("spinBoxMaxRate")
+        self.formLayoutCapture.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.spinBoxMaxRate)
+        self.labelMinDistance = QtWidgets.QLabel(self.groupBoxCapture)
+        self.labelMinDistance.setObjectName("labelMinDistance")
+        self.formLayoutCapture.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.labelMinDistance)
+        self.spinBoxMinDistance = QtWidgets.QSpinBox(self.groupBoxCapture)
+        self.spinBoxMinDistance.setMaximum(1000)
+        self.spinBoxMinDistance.setObjectName("spinBoxMinDistance")
+        self.formLayoutCapture.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.spinBoxMinDistance)
+        self.labelMinInterval = QtWidgets.QLabel(self.groupBoxCapture)
+        self.labelMinInterval.setObjectName("labelMinInterval")
+        self.formLayoutCapture.setWidget(2, QtWidgets.QFormLayout.LabelRole, self.labelMinInterval)
+        self.spinBoxMinInterval = QtWidgets.QDoubleSpinBox(self.groupBoxCapture)
+        self.spinBoxMinInterval.setDecimals(1)
+        self.spinBoxMinInterval.setMaximum(1000.0)
+        self.spinBoxMinInterval.setObjectName("spinBoxMinInterval")
+        self.formLayoutCapture.setWidget(2, QtWidgets.QFormLayout.FieldRole, self.spinBoxMinInterval)
+        self.labelSimplify = QtWidgets.QLabel(self.groupBoxCapture)
+        self.labelSimplify.setObjectName("labelSimplify")
+        self.formLayoutCapture.setWidget(3, QtWidgets.QFormLayout.LabelRole, self.labelSimplify)
+        self.spinBoxSimplify = QtWidgets.QDoubleSpinBox(self.groupBoxCapture)
+        self.spinBoxSimplify.setDecimals(1)
+        self.spinBoxSimplify.setMaximum(100.0)
+        self.spinBoxSimplify.setSingleStep(0.5)
+        self.spinBoxSimplify.setObjectName("spinBoxSimplify")
+        self.formLayoutCapture.setWidget(3, QtWidgets.QFormLayout.FieldRole, self.spinBoxSimplify)
+        self.labelMemoryLimit = QtWidgets.QLabel(self.groupBoxCapture)
+        self.labelMemoryLimit.setObjectName("labelMemoryLimit")
+        self.formLayoutCapture.setWidget(4, QtWidgets.QFormLayout.LabelRole, self.labelMemoryLimit)
+        self.spinBoxMemoryLimit = QtWidgets.QSpinBox(self.groupBoxCapture)
+        self.spinBoxMemoryLimit.setMinimum(1)
+        self.spinBoxMemoryLimit.setMaximum(4096)
+        self.spinBoxMemoryLimit.setProperty("value", 32)
+        self.spinBoxMemoryLimit.setObjectName("spinBoxMemoryLimit")
+        self.formLayoutCapture.setWidget(4, QtWidgets.QFormLayout.FieldRole, self.spinBoxMemoryLimit)
+        self.verticalLayout.addWidget(self.groupBoxCapture)
+        self.groupBoxPlayback = QtWidgets.QGroupBox(MainWidget)
+        self.groupBoxPlayback.setObjectName("groupBoxPlayback")
+        self.formLayoutPlayback = QtWidgets.QFormLayout(self.groupBoxPlayback)
+        self.formLayoutPlayback.setContentsMargins(11, 11, 11, 11)
+        self.formLayoutPlayback.setSpacing(6)
+        self.formLayoutPlayback.setObjectName("formLayoutPlayback")
+        self.labelSpeed = QtWidgets.QLabel(self.groupBoxPlayback)
+        self.labelSpeed.setObjectName("labelSpeed")
+        self.formLayoutPlayback.setWidget(0, QtWidgets.QFormLayout.LabelRole, self.labelSpeed)
+        self.spinBoxSpeed = QtWidgets.QDoubleSpinBox(self.groupBoxPlayback)
+        self.spinBoxSpeed.setMinimum(0.25)
+        self.spinBoxSpeed.setMaximum(20.0)
+        self.spinBoxSpeed.setSingleStep(0.25)
+        self.spinBoxSpeed.setProperty("value", 1.0)
+        self.spinBoxSpeed.setObjectName("spinBoxSpeed")
+        self.formLayoutPlayback.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.spinBoxSpeed)
+        self.labelMaxGap = QtWidgets.QLabel(self.groupBoxPlayback)
+        self.labelMaxGap.setObjectName("labelMaxGap")
+        self.formLayoutPlayback.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.labelMaxGap)
+        self.spinBoxMaxGap = QtWidgets.QDoubleSpinBox(self.groupBoxPlayback)
+        self.spinBoxMaxGap.setDecimals(1)
+        self.spinBoxMaxGap.setMaximum(3600.0)
+        self.spinBoxMaxGap.setObjectName("spinBoxMaxGap")
+        self.formLayoutPlayback.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.spinBoxMaxGap)
+        self.checkBoxFast = QtWidgets.QCheckBox(self.groupBoxPlayback)
+        self.checkBoxFast.setObjectName("checkBoxFast")
+        self.formLayoutPlayback.setWidget(2, QtWidgets.QFormLayout.SpanningRole, self.checkBoxFast)
+        self.labelSettle = QtWidgets.QLabel(self.groupBoxPlayback)
+        self.labelSettle.setObjectName("labelSettle")
+        self.formLayoutPlayback.setWidget(3, QtWidgets.QFormLayout.LabelRole, self.labelSettle)
+        self.spinBoxSettle = QtWidgets.QSpinBox(self.groupBoxPlayback)
+        self.spinBoxSettle.setMaximum(1000)
+        self.spinBoxSettle.setProperty("value", 15)
+        self.spinBoxSettle.setObjectName("spinBoxSettle")
+        self.formLayoutPlayback.setWidget(3, QtWidgets.QFormLayout.FieldRole, self.spinBoxSettle)
+        self.verticalLayout.addWidget(self.groupBoxPlayback)
+        spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.verticalLayout.addItem(spacerItem)
 
         self.retranslateUi(MainWidget)
         QtCore.QMetaObject.connectSlotsByName(MainWidget)
@@ -22,5 +111,27 @@ class Ui_MainWidget(object):
     def retranslateUi(self, MainWidget):
         _translate = QtCore.QCoreApplication.translate
         MainWidget.setWindowTitle(_translate("MainWidget", "MainWidget"))
+        self.groupBoxCapture.setTitle(_translate("MainWidget", "Запись движений"))
+        self.labelMaxRate.setText(_translate("MainWidget", "Максимальная частота"))
+        self.spinBoxMaxRate.setSpecialValueText(_translate("MainWidget", "без ограничения"))
+        self.spinBoxMaxRate.setSuffix(_translate("MainWidget", " Гц"))
+        self.labelMinDistance.setText(_translate("MainWidget", "Минимальное смещение"))
+        self.spinBoxMinDistance.setSuffix(_translate("MainWidget", " пкс"))
+        self.labelMinInterval.setText(_translate("MainWidget", "Минимальный интервал"))
+        self.spinBoxMinInterval.setSuffix(_translate("MainWidget", " мс"))
+        self.labelSimplify.setText(_translate("MainWidget", "Упрощение пути"))
+        self.spinBoxSimplify.setSpecialValueText(_translate("MainWidget", "выключено"))
+        self.spinBoxSimplify.setSuffix(_translate("MainWidget", " пкс"))
+        self.labelMemoryLimit.setText(_translate("MainWidget", "Лимит памяти"))
+        self.spinBoxMemoryLimit.setSuffix(_translate("MainWidget", " МБ"))
+        self.groupBoxPlayback.setTitle(_translate("MainWidget", "Воспроизведение"))
+        self.labelSpeed.setText(_translate("MainWidget", "Скорость"))
+        self.spinBoxSpeed.setSuffix(_translate("MainWidget", "x"))
+        self.labelMaxGap.setText(_translate("MainWidget", "Максимальная пауза"))
+        self.spinBoxMaxGap.setSpecialValueText(_translate("MainWidget", "без ограничения"))
+        self.spinBoxMaxGap.setSuffix(_translate("MainWidget", " с"))
+        self.checkBoxFast.setText(_translate("MainWidget", "Как можно быстрее"))
+        self.labelSettle.setText(_translate("MainWidget", "Пауза у нажатий"))
+        self.spinBoxSettle.setSuffix(_translate("MainWidget", " мс"))
 
 import resources_rc
@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import re
+import signal
+import time
+
+from catalog import recording_stats
+from recordformat import COLUMNS, DEFAULT_CODEC, EXTENSION, is_legacy, load_legacy_recording, \
+    load_recording, save_recording
+
+JOURNAL_FILE = '.cobalt_migration'
+LEGACY_NAME = re.compile(r'.+_\d\d_\d\d_\d\d_\d\d_\d{4}\.json$')
+BATCH_SIZE = 100
+
+
+class MigrationError(Exception):
+    pass
+
+
+def target_file_name(source):
+    return os.path.splitext(source)[0] + EXTENSION
+
+
+def find_legacy_files(directory):
+    return sorted(os.path.join(directory, entry.name) for entry in os.scandir(directory)
+                  if entry.is_file() and LEGACY_NAME.match(entry.name))
+
+
+def read_journal(journal_file):
+    if not os.path.isfile(journal_file):
+        return set()
+    with open(journal_file, 'r') as f:
+        return set(line.rstrip('\n') for line in f if line.endswith('\n'))
+
+
+def verify_round_trip(recording, file_name):
+    copy = load_recording(file_name)
+    if (copy.name, copy.description, copy.created) != (recording.name, recording.description, recording.created):
+        raise MigrationError('header differs after round trip')
+    for name, _ in COLUMNS:
+        if getattr(copy.events, name) != getattr(recording.events, name):
+            raise MigrationError('column {} differs after round trip'.format(name))
+
+
+def _ignore_interrupt():
+    # Ctrl+C is handled by the parent, which records finished files before stopping the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def convert_file(job):
+    source, codec = job
+    target = target_file_name(source)
+    temp_target = target + '.tmp'
+    try:
+        if not is_legacy(source):
+            raise MigrationError('not a legacy JSON recording')
+        recording = load_legacy_recording(source)
+        save_recording(recording, temp_target, codec)
+        verify_round_trip(recording, temp_target)
+        os.replace(temp_target, target)
+        sizes = os.path.getsize(source), os.path.getsize(target)
+    except Exception as e:
+        # Whatever one file raises is reported for that file, an exception leaving the worker would end the run
+        try:
+            os.remove(temp_target)
+        except OSError:
+            pass
+        return source, None, str(e) or type(e).__name__
+
+    events = recording.events
+    duration = events.ts[-1] - events.ts[0] if len(events) else 0
+    stats = (recording.created, duration, len(events), events.pressed.count(1))
+    return source, target, sizes + (stats,)
+
+
+class Migration(object):
+    def __init__(self, directory='.', catalog=None, jobs=None, codec=DEFAULT_CODEC, delete_source=False):
+        self.directory = directory
+        self.catalog = catalog
+        self.jobs = jobs or os.cpu_count() or 1
+        self.codec = codec
+        self.delete_source = delete_source
+        self.journal_file = os.path.join(directory, JOURNAL_FILE)
+        self.converted = 0
+        self.skipped = 0
+        self.failed = []
+        self.events = 0
+        self.source_bytes = 0
+        self.target_bytes = 0
+        self.seconds = 0.0
+
+    def sources(self):
+        done = read_journal(self.journal_file)
+        sources = set(os.path.abspath(source) for source in find_legacy_files(self.directory))
+        records = {}
+        if self.catalog is not None:
+            for record_id, file_name in self.catalog.legacy_files():
+                source = os.path.abspath(file_name)
+                records.setdefault(source, []).append((record_id, file_name))
+                if os.path.isfile(source):
+                    sources.add(source)
+        pending = sorted(source for source in sources if source not in done)
+        self.skipped = len(sources) - len(pending)
+
+        # Entries of files migrated by an earlier run that did not have this catalog
+        stale = [(record_id, target_file_name(file_name), recording_stats(target_file_name(source)))
+                 for source, entries in records.items() if source in done and os.path.isfile(target_file_name(source))
+                 for record_id, file_name in entries]
+        if stale:
+            self.catalog.update_files(stale)
+        return pending, records
+
+    def commit(self, batch, records, journal):
+        if self.catalog is not None:
+            self.catalog.update_files((record_id, target_file_name(file_name), stats)
+                                      for source, stats in batch
+                                      for record_id, file_name in records.get(source, ()))
+        for source, _ in batch:
+            journal.write(source + '\n')
+            if self.delete_source:
+                os.remove(source)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def run(self, progress=None):
+        pending, records = self.sources()
+        start = time.perf_counter()
+        batch = []
+        with open(self.journal_file, 'a') as journal, multiprocessing.Pool(self.jobs, _ignore_interrupt) as pool:
+            try:
+                results = pool.imap_unordered(convert_file, ((source, self.codec) for source in pending),
+                                              chunksize=max(1, min(BATCH_SIZE, len(pending) // (self.jobs * 4))))
+                for source, target, result in results:
+                    if target is None:
+                        self.failed.append((source, result))
+                        continue
+                    source_bytes, target_bytes, stats = result
+                    self.converted += 1
+                    self.events += stats[2]
+                    self.source_bytes += source_bytes
+                    self.target_bytes += target_bytes
+                    batch.append((source, stats))
+                    if len(batch) >= BATCH_SIZE:
+                        self.commit(batch, records, journal)
+                        batch = []
+                        if progress is not None:
+                            progress(self, len(pending))
+            finally:
+                # Whatever finished before an interruption is recorded, the rest is picked up by the next run
+                self.commit(batch, records, journal)
+                self.seconds = time.perf_counter() - start
+        return self
+
+
+def migration_summary(migration):
+    seconds = max(migration.seconds, 1e-9)
+    saved = migration.source_bytes - migration.target_bytes
+    return ('converted {} files ({} events) in {:.1f} s: {:.1f} files/s, {:.0f} events/s, {:.1f} MB/s of JSON\n'
+            'skipped {} already migrated, {} failed\n'
+            'size {} -> {} bytes, saved {} bytes ({:.1f}%)').format(
+        migration.converted, migration.events, migration.seconds, migration.converted / seconds,
+        migration.events / seconds, migration.source_bytes / seconds / 2 ** 20,
+        migration.skipped, len(migration.failed),
+        migration.source_bytes, migration.target_bytes, saved,
+        100.0 * saved / migration.source_bytes if migration.source_bytes else 0.0)
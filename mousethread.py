@@ -0,0 +1,105 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capturepolicy import policy_summary
+from catalog import CATALOG_FILE
+from engine import MEMORY_LIMIT, Recorder
+from inputbackend import pynput_backend
+from inputworker import InputWorker, RecordJob, play_job
+from playback import format_duration
+from playlist import playlist_summary
+from recordsaver import RecordSaver, SaveJob
+from recordformat import MOVE, CLICK
+from simplify import simplify_summary
+from timingreport import report_summary
+
+
+class MouseThread(QThread):
+    MOVE = MOVE
+    CLICK = CLICK
+
+    mouse_input_record_end = pyqtSignal(str, str)
+    mouse_input_play_start = pyqtSignal(str, str, str)
+    mouse_input_play_end = pyqtSignal(str, str, str)
+    mouse_input_save_progress = pyqtSignal(int, str)
+    mouse_input_saved = pyqtSignal(str, str, int, str)
+
+    def __init__(self, parent=None, plan_cache=None, backend=None, catalog_path=CATALOG_FILE):
+        QThread.__init__(self, parent)
+
+        self.backend = backend if backend is not None else pynput_backend()
+        self.worker = InputWorker(self.backend, plan_cache)
+        self.saver = RecordSaver(catalog_path)
+        self.recorder = None
+
+    def run(self):
+        self.saver.start()
+        self.worker.run()
+
+    def play(self, records, options=None):
+        self.worker.submit(play_job(records, self.on_play_done, options, self.on_play_start))
+
+    @staticmethod
+    def job_title(job):
+        items = job.items
+        return ', '.join(item.name for item in items), items[0].description if len(items) == 1 else ''
+
+    def on_play_start(self, job):
+        name, description = self.job_title(job)
+        if job.expected_ns is None:
+            expected = 'неизвестна'
+        elif job.expected_exact:
+            expected = format_duration(job.expected_ns)
+        else:
+            expected = 'не более {}'.format(format_duration(job.expected_ns))
+        self.mouse_input_play_start.emit(name, description, expected)
+
+    def on_play_done(self, job):
+        items = job.items
+        if job.error is not None:
+            summary = 'Ошибка: {}'.format(job.error)
+        elif len(items) == 1:
+            summary = report_summary(job.timings[0]) if job.timings else ''
+        else:
+            summary = playlist_summary(job.playlist)
+        if job.first_event_ns is not None:
+            summary += '\nПервое событие через {:.1f} мс'.format(job.first_event_ns / 1e6)
+        name, description = self.job_title(job)
+        self.mouse_input_play_end.emit(name, description, summary)
+
+    def record(self, name, description, policy=None, simplify_epsilon=0, memory_limit=MEMORY_LIMIT):
+        self.recorder = Recorder(name, description, self.backend, on_end=self.on_record_end, policy=policy,
+                                 simplify_epsilon=simplify_epsilon, memory_limit=memory_limit)
+        self.worker.submit(RecordJob(self.recorder, on_done=self.on_record_done))
+
+    def on_record_end(self):
+        self.mouse_input_record_end.emit(self.recorder.name, self.recorder.description)
+
+    def on_record_done(self, job):
+        # A recording that ended normally was announced by its middle click, only a failure is reported here
+        if job.error is not None:
+            recorder = job.recorder
+            self.mouse_input_saved.emit(recorder.name, recorder.description, -1, 'Ошибка: {}'.format(job.error))
+
+    def save(self):
+        self.saver.submit(SaveJob(self.recorder, self.on_save_progress, self.on_save_done))
+
+    def on_save_progress(self, job, percent, stage):
+        self.mouse_input_save_progress.emit(percent, stage)
+
+    def on_save_done(self, job):
+        recorder = job.recorder
+        if job.error is not None:
+            self.mouse_input_saved.emit(recorder.name, recorder.description, -1, 'Ошибка: {}'.format(job.error))
+            return
+        summary = policy_summary(recorder.policy)
+        if recorder.simplified is not None:
+            summary += '\n' + simplify_summary(*recorder.simplified)
+        summary += '\nПотеряно движений: {}, нажатий: {}, максимальная очередь: {}, ожиданий диска: {}'.format(
+            recorder.ring.overflows, recorder.ring.click_overflows, recorder.ring.high_water, recorder.writer.stalls)
+        self.mouse_input_saved.emit(recorder.name, recorder.description, job.record['id'], summary)
+
+    def stop(self):
+        self.worker.stop()
+        self.wait()
+        if self.saver.is_alive():
+            self.saver.stop()
@@ -0,0 +1,256 @@
+import array
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+
+from playback import PlanChunk, PlaybackPlan, TimingProfile, button_table, compile_plan
+from recordformat import VERSION as FORMAT_VERSION
+
+CACHE_DIR = '.cobalt_cache'
+MAGIC = b'CBLP'
+VERSION = 3
+MAX_BYTES = 256 * 1024 * 1024
+
+_HEADER = struct.Struct('<4sHI')
+_COLUMNS = (('kind', 'B'), ('dx', 'i'), ('dy', 'i'), ('deadline', 'q'), ('button', 'B'), ('pressed', 'B'))
+_EVENT_SIZE = sum(array.array(typecode).itemsize for _, typecode in _COLUMNS)
+# The timing profile follows the chunks, its long gaps first and then settle gaps, short gaps, their total and the
+# number of long gaps
+_TRAILER = struct.Struct('<qqqq')
+_GAP_SIZE = array.array('q').itemsize
+
+
+def source_key(file_name):
+    digest = hashlib.sha256()
+    digest.update('{}:{}:'.format(FORMAT_VERSION, VERSION).encode('ascii'))
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _column_bytes(column):
+    if sys.byteorder != 'little':
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_meta(plan, f):
+    meta = json.dumps({'name': plan.name,
+                       'description': plan.description,
+                       'start_x': plan.start_x,
+                       'start_y': plan.start_y,
+                       'duration': plan.source_duration,
+                       'chunks': plan.chunk_counts,
+                       'typecodes': [typecode for _, typecode in _COLUMNS]}).encode('utf-8')
+    f.write(_HEADER.pack(MAGIC, VERSION, len(meta)))
+    f.write(meta)
+
+
+def write_chunk(chunk, f):
+    for name, typecode in _COLUMNS:
+        column = getattr(chunk, name)
+        if column.typecode != typecode:
+            column = array.array(typecode, column)
+        f.write(_column_bytes(column))
+
+
+def write_profile(profile, f):
+    f.write(_column_bytes(profile.long_gaps))
+    f.write(_TRAILER.pack(profile.settle_gaps, profile.short_gaps, profile.short_total, len(profile.long_gaps)))
+
+
+def parse_chunk(buf, count):
+    if len(buf) != count * _EVENT_SIZE:
+        raise ValueError('Truncated plan chunk')
+    columns = []
+    offset = 0
+    for _, typecode in _COLUMNS:
+        column = array.array(typecode)
+        size = count * column.itemsize
+        column.frombytes(buf[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    return PlanChunk(*columns)
+
+
+class PlanFile(object):
+    def __init__(self, f, offset, chunk_counts):
+        self.file = f
+        self.offset = offset
+        self.chunk_counts = chunk_counts
+
+    def iter_chunks(self):
+        offset = self.offset
+        for count in self.chunk_counts:
+            self.file.seek(offset)
+            buf = self.file.read(count * _EVENT_SIZE)
+            offset += len(buf)
+            yield parse_chunk(buf, count)
+
+    def close(self):
+        self.file.close()
+
+
+class CachingSource(object):
+    def __init__(self, source, plan, path, cache):
+        self.source = source
+        self.plan = plan
+        self.path = path
+        self.cache = cache
+        self.busy = False
+
+    def iter_chunks(self):
+        # The first full pass over the plan, normally its first playback, writes the cache entry on the way
+        if self.busy or self.path is None:
+            for chunk in self.source.iter_chunks():
+                yield chunk
+            return
+
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Every writer gets its own temporary file, concurrent cobalt play runs may compile the same recording
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        except OSError:
+            # A read-only recordings directory plays without a cache
+            self.path = None
+            for chunk in self.source.iter_chunks():
+                yield chunk
+            return
+
+        self.busy = True
+        f = os.fdopen(fd, 'wb')
+        try:
+            counts = []
+            profile = TimingProfile()
+            try:
+                write_meta(self.plan, f)
+            except OSError:
+                f.close()
+            for chunk in self.source.iter_chunks():
+                if not f.closed:
+                    try:
+                        write_chunk(chunk, f)
+                        profile.add(chunk)
+                    except OSError:
+                        # A full disk costs the cache entry, never the playback
+                        f.close()
+                counts.append(len(chunk))
+                yield chunk
+            if not f.closed and counts == self.plan.chunk_counts:
+                try:
+                    write_profile(profile, f)
+                    f.close()
+                    os.replace(temp_path, self.path)
+                except OSError:
+                    pass
+                self.path = None
+                self.cache.evict(directory)
+        finally:
+            self.busy = False
+            if not f.closed:
+                f.close()
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def close(self):
+        self.source.close()
+
+
+def _read_plan(f, button_map, default_button):
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    magic, version, meta_size = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    meta = json.loads(f.read(meta_size).decode('utf-8'))
+    chunk_counts = [int(count) for count in meta['chunks']]
+    offset = _HEADER.size + meta_size
+    profile_offset = offset + sum(chunk_counts) * _EVENT_SIZE
+    size = os.fstat(f.fileno()).st_size
+    if meta['typecodes'] != [typecode for _, typecode in _COLUMNS] or size < profile_offset + _TRAILER.size:
+        return None
+    f.seek(size - _TRAILER.size)
+    settle_gaps, short_gaps, short_total, long_count = _TRAILER.unpack(f.read(_TRAILER.size))
+    # A torn or truncated entry is a miss, the plan is compiled again instead of failing halfway through playback
+    if size != profile_offset + long_count * _GAP_SIZE + _TRAILER.size:
+        return None
+    f.seek(profile_offset)
+    long_gaps = array.array('q')
+    long_gaps.frombytes(f.read(long_count * _GAP_SIZE))
+    if sys.byteorder != 'little':
+        long_gaps.byteswap()
+    return PlaybackPlan(meta['name'], meta['description'], meta['start_x'], meta['start_y'], chunk_counts,
+                        meta['duration'], button_table(button_map, default_button), PlanFile(f, offset, chunk_counts),
+                        profile=TimingProfile(settle_gaps, short_gaps, short_total, long_gaps))
+
+
+def open_plan(path, button_map, default_button=None):
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        plan = _read_plan(f, button_map, default_button)
+    except (ValueError, KeyError, TypeError):
+        plan = None
+    if plan is None:
+        f.close()
+    return plan
+
+
+class PlanCache(object):
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def directory(file_name):
+        return os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR)
+
+    def load(self, file_name, button_map, default_button=None):
+        directory = self.directory(file_name)
+        path = os.path.join(directory, source_key(file_name) + '.plan')
+
+        plan = open_plan(path, button_map, default_button)
+        if plan is not None:
+            # Another process sharing the cache may evict the entry right after it was opened
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return plan
+
+        # A miss costs no more than the header and the first chunk, the plan is compiled as it is played
+        plan = compile_plan(file_name, button_map, default_button)
+        plan.source = CachingSource(plan.source, plan, path, self)
+        return plan
+
+    def evict(self, directory):
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.plan'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Another process sharing the cache may have evicted the same entry first, or may still be playing it
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
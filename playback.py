@@ -0,0 +1,250 @@
+import array
+import itertools
+import operator
+
+from recordformat import CLICK, MOVE, RecordingReader
+
+MIN_SPEED = 0.25
+MAX_SPEED = 20.0
+SETTLE_MS = 15
+BUTTON_CODES = 256
+# Gaps longer than this are kept one by one in a timing profile, any gap cap at least this long is estimated exactly
+LONG_GAP_NS = 10000000
+
+
+class PlanChunk(object):
+    __slots__ = ('kind', 'dx', 'dy', 'deadline', 'button', 'pressed')
+
+    def __init__(self, kind, dx, dy, deadline, button, pressed):
+        self.kind = kind
+        self.dx = dx
+        self.dy = dy
+        self.deadline = deadline
+        self.button = button
+        self.pressed = pressed
+
+    def __len__(self):
+        return len(self.kind)
+
+
+class TimingProfile(object):
+    def __init__(self, settle_gaps=0, short_gaps=0, short_total=0, long_gaps=None):
+        self.settle_gaps = settle_gaps
+        self.short_gaps = short_gaps
+        self.short_total = short_total
+        self.long_gaps = long_gaps if long_gaps is not None else array.array('q')
+        self.last_kind = None
+        self.last_deadline = None
+
+    def add(self, chunk):
+        kind = chunk.kind
+        deadline = chunk.deadline
+        if self.last_deadline is None:
+            self.last_kind, self.last_deadline = kind[0], deadline[0]
+            kind, deadline = kind[1:], deadline[1:]
+        if len(kind) == 0:
+            return
+        gaps = list(map(operator.sub, deadline, itertools.chain((self.last_deadline,), deadline)))
+        long_gaps = list(filter(LONG_GAP_NS.__lt__, gaps))
+        # The fast mode settles a gap that has a press or a release on either side
+        self.settle_gaps += sum(map(operator.or_, kind, itertools.chain((self.last_kind,), kind)))
+        self.short_gaps += len(gaps) - len(long_gaps)
+        self.short_total += sum(gaps) - sum(long_gaps)
+        self.long_gaps.extend(long_gaps)
+        self.last_kind, self.last_deadline = kind[-1], deadline[-1]
+
+    def capped(self, speed, max_gap):
+        limit = max_gap * speed
+        if limit >= LONG_GAP_NS:
+            longer = list(filter(limit.__lt__, self.long_gaps))
+            total = self.short_total + sum(self.long_gaps) - sum(longer)
+            return int(total / speed) + len(longer) * max_gap, True
+        # Every long gap is cut to the cap, the short ones are only known in total
+        short = min(int(self.short_total / speed), self.short_gaps * max_gap)
+        return short + len(self.long_gaps) * max_gap, False
+
+
+class RecordingSource(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+
+    def iter_chunks(self):
+        with RecordingReader(self.file_name) as reader:
+            for chunk in compile_chunks(reader.iter_chunks()):
+                yield chunk
+
+    def close(self):
+        pass
+
+
+class PlaybackPlan(object):
+    def __init__(self, name, description, start_x, start_y, chunk_counts, duration, buttons, source, options=None,
+                 profile=None):
+        self.name = name
+        self.description = description
+        self.start_x = start_x
+        self.start_y = start_y
+        self.chunk_counts = chunk_counts
+        self.count = sum(chunk_counts)
+        self.source_duration = duration
+        self.buttons = buttons
+        self.source = source
+        self.options = options
+        self.profile = profile
+
+    def __len__(self):
+        return self.count
+
+    def retimed(self):
+        return self.options is not None and self.options.changes_timing()
+
+    def iter_chunks(self):
+        # Only one compiled chunk is in memory at a time, however long the recording is
+        chunks = self.source.iter_chunks()
+        return retime_chunks(chunks, self.options) if self.retimed() else chunks
+
+    def deadlines(self):
+        for chunk in self.iter_chunks():
+            for deadline in chunk.deadline:
+                yield deadline
+
+    def close(self):
+        self.source.close()
+
+
+class PlaybackOptions(object):
+    def __init__(self, speed=1.0, max_gap_ms=0, fast=False, settle_ms=SETTLE_MS):
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError('Playback speed must be between {}x and {}x'.format(MIN_SPEED, MAX_SPEED))
+        self.speed = speed
+        self.max_gap_ms = max_gap_ms
+        self.fast = fast
+        self.settle_ms = settle_ms
+
+    def changes_timing(self):
+        return self.fast or self.speed != 1.0 or self.max_gap_ms > 0
+
+
+def _deltas(column, previous, typecode):
+    return array.array(typecode, map(operator.sub, column, itertools.chain((previous,), column)))
+
+
+def button_table(button_map, default_button=None):
+    # Button objects are looked up by the one byte code of the event instead of being stored per event
+    return tuple(button_map.get(code, default_button) for code in range(BUTTON_CODES))
+
+
+def compile_chunks(chunks):
+    start_ts = last_x = last_y = None
+    for events in chunks:
+        if len(events) == 0:
+            continue
+        if start_ts is None:
+            start_ts, last_x, last_y = events.ts[0], events.x[0], events.y[0]
+        deadline = array.array('q', map(operator.sub, events.ts, itertools.repeat(start_ts)))
+        yield PlanChunk(events.type, _deltas(events.x, last_x, 'i'), _deltas(events.y, last_y, 'i'), deadline,
+                        events.button, events.pressed)
+        last_x, last_y = events.x[-1], events.y[-1]
+
+
+def compile_plan(file_name, button_map, default_button=None):
+    # Only the header, the first chunk and the last chunk are read here, the rest is compiled as it is played
+    with RecordingReader(file_name) as reader:
+        chunk_counts = [count for _, count in reader.chunks if count]
+        first = reader.chunk(0) if chunk_counts else None
+        start_x, start_y = (first.x[0], first.y[0]) if first is not None else (0, 0)
+        return PlaybackPlan(reader.name, reader.description, start_x, start_y, chunk_counts, reader.duration(),
+                            button_table(button_map, default_button), RecordingSource(file_name))
+
+
+def retime(plan, options):
+    if options is None or not options.changes_timing() or len(plan) == 0:
+        return plan
+    return PlaybackPlan(plan.name, plan.description, plan.start_x, plan.start_y, plan.chunk_counts,
+                        plan.source_duration, plan.buttons, plan.source, options, plan.profile)
+
+
+def retime_chunks(chunks, options):
+    settle = int(options.settle_ms * 1000000)
+    max_gap = int(options.max_gap_ms * 1000000) if options.max_gap_ms > 0 else None
+    speed = options.speed
+    previous_kind = previous_deadline = None
+    elapsed = 0
+    for chunk in chunks:
+        deadline = array.array('q')
+        for kind, original in zip(chunk.kind, chunk.deadline):
+            if previous_kind is not None:
+                if options.fast:
+                    # Moves are sent back to back, only presses and releases get time to settle on both sides
+                    elapsed += settle if previous_kind == CLICK or kind == CLICK else 0
+                else:
+                    gap = original - previous_deadline
+                    if speed != 1.0:
+                        gap = int(gap / speed)
+                    elapsed += min(gap, max_gap) if max_gap is not None else gap
+            deadline.append(elapsed)
+            previous_kind = kind
+            previous_deadline = original
+        yield PlanChunk(chunk.kind, chunk.dx, chunk.dy, deadline, chunk.button, chunk.pressed)
+
+
+def estimate_duration(plan, options):
+    # Returns the duration and whether it is exact, a plan without a timing profile only gives an upper bound
+    duration = plan.source_duration
+    if options is None or not options.changes_timing():
+        return duration, True
+    profile = plan.profile
+    gaps = max(len(plan) - 1, 0)
+    if options.fast:
+        settle = int(options.settle_ms * 1000000)
+        return (profile.settle_gaps if profile is not None else gaps) * settle, profile is not None
+    if options.max_gap_ms <= 0:
+        return int(duration / options.speed), True
+    max_gap = int(options.max_gap_ms * 1000000)
+    if profile is not None:
+        return profile.capped(options.speed, max_gap)
+    return min(int(duration / options.speed), gaps * max_gap), False
+
+
+def format_duration(duration_ns):
+    tenths = int(round(duration_ns / 1e8))
+    seconds = tenths // 10
+    return '{}:{:02d}:{:02d}.{}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60, tenths % 10)
+
+
+def play(plan, mouse, scheduler, start=None):
+    if len(plan) == 0:
+        return None
+
+    buttons = plan.buttons
+    wait = scheduler.wait
+    held = set()
+    end = 0
+
+    mouse.position = (plan.start_x, plan.start_y)
+    scheduler.begin(start)
+    for chunk in plan.iter_chunks():
+        kind = chunk.kind
+        dx = chunk.dx
+        dy = chunk.dy
+        deadline = chunk.deadline
+        button = chunk.button
+        pressed = chunk.pressed
+        for idx in range(len(kind)):
+            if wait(deadline[idx]) is None:
+                # Cancelled, nothing may stay pressed after playback stops halfway through a drag
+                for held_button in held:
+                    mouse.release(held_button)
+                return None
+            if dx[idx] or dy[idx]:
+                mouse.move(dx[idx], dy[idx])
+            if kind[idx] == MOVE:
+                continue
+            if pressed[idx]:
+                mouse.press(buttons[button[idx]])
+                held.add(buttons[button[idx]])
+            else:
+                mouse.release(buttons[button[idx]])
+                held.discard(buttons[button[idx]])
+        end = deadline[-1]
+    return end
@@ -0,0 +1,144 @@
+import array
+import json
+import os
+import sys
+import threading
+import time
+
+from engine import Player
+from plancache import PlanCache
+from playback import estimate_duration
+from recordformat import FormatError, is_legacy
+
+# The playing thread has to win the GIL back from the preloader as soon as its sleep ends
+SWITCH_INTERVAL = 0.0005
+
+
+class PlaylistItem(object):
+    def __init__(self, file_name, name='', description='', loops=1, delay_ms=0):
+        self.file_name = file_name
+        self.name = name
+        self.description = description
+        self.loops = loops
+        self.delay_ms = delay_ms
+
+
+def playlist_item(record, loops=1, delay_ms=0):
+    return PlaylistItem(record['file_name'], record['name'], record['description'], loops, delay_ms)
+
+
+def read_playlist(file_name):
+    with open(file_name, 'r') as f:
+        entries = json.load(f)
+    playlist = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            entry = {'record': entry}
+        playlist.append((str(entry['record']), int(entry.get('loops', 1)), int(entry.get('delay_ms', 0))))
+    return playlist
+
+
+class PlaylistPlayer(object):
+    def __init__(self, items, backend, plan_cache=None, options=None):
+        self.items = items
+        self.backend = backend
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.options = options
+        self.players = {}
+        for item in items:
+            if item.file_name not in self.players:
+                self.players[item.file_name] = Player(item.file_name, backend, self.plan_cache, options)
+        self.played = []
+        self.transitions = array.array('q')
+        self.cancelled = threading.Event()
+
+    def preload(self, idx):
+        if idx >= len(self.items):
+            return None
+        loader = threading.Thread(target=self._load, args=(self.players[self.items[idx].file_name],))
+        loader.daemon = True
+        loader.start()
+        return loader
+
+    def _load(self, player):
+        if player.plan is not None:
+            return
+        player.load()
+        # Nobody waits for a preloader after a cancel, a plan it opens then would never be closed
+        if self.cancelled.is_set():
+            player.close()
+
+    def expected_duration(self):
+        # Loading reads the header, the first and the last chunk, and the timing profile of a cached plan, nothing is
+        # compiled and the preloader later finds the plans ready
+        total = 0
+        exact = True
+        for item in self.items:
+            player = self.players[item.file_name]
+            if player.plan is None and os.path.isfile(item.file_name):
+                try:
+                    # A legacy JSON recording would have to be parsed whole before playback even starts
+                    if is_legacy(item.file_name):
+                        return None, False
+                    player.load()
+                except (FormatError, OSError, ValueError):
+                    return None, False
+            # A missing file plays nothing
+            duration, item_exact = estimate_duration(player.plan, self.options) if player.plan else (0, True)
+            exact = exact and item_exact
+            total += item.loops * (item.delay_ms * 1000000 + duration)
+        return total, exact
+
+    def play(self, controller=None):
+        controller = controller if controller is not None else self.backend.Controller()
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SWITCH_INTERVAL)
+        loader = self.preload(0)
+        start = None
+        try:
+            for idx, item in enumerate(self.items):
+                if self.cancelled.is_set():
+                    break
+                if loader.is_alive():
+                    # The previous item ended before this one was compiled, its end is no longer a usable origin
+                    loader.join()
+                    start = None
+                loader = self.preload(idx + 1)
+
+                player = self.players[item.file_name]
+                for _ in range(item.loops):
+                    start = (start if start is not None else time.monotonic_ns()) + item.delay_ms * 1000000
+                    scheduler = player.play(controller, start, self.cancelled)
+                    if scheduler is None or scheduler.start is None:
+                        start = None
+                        continue
+                    if self.played and scheduler.lateness:
+                        self.transitions.append(scheduler.lateness[0])
+                    self.played.append((item, player, scheduler))
+                    if player.end is None:
+                        break
+                    start = scheduler.start + player.end
+        finally:
+            sys.setswitchinterval(switch_interval)
+            # A cancelled run returns at once, the preloader is a daemon and closes what it loaded itself
+            if loader is not None and not self.cancelled.is_set():
+                loader.join()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def reports(self):
+        for item, player, scheduler in self.played:
+            yield item, player.report(scheduler)
+
+    def close(self):
+        for player in self.players.values():
+            player.close()
+
+
+def playlist_summary(playlist):
+    transitions = playlist.transitions
+    if not transitions:
+        return 'Проиграно записей: {}'.format(len(playlist.played))
+    return 'Проиграно записей: {}, переход: средний {:.3f} мс, максимальный {:.3f} мс'.format(
+        len(playlist.played), sum(transitions) / len(transitions) / 1e6, max(transitions) / 1e6)
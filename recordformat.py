@@ -0,0 +1,321 @@
+import array
+import json
+import lzma
+import mmap
+import struct
+import sys
+import zlib
+
+from deltacodec import decode_columns, encode_columns
+
+MAGIC = b'CBLT'
+VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+EXTENSION = '.cobalt'
+
+CHUNK_EVENTS = 4096
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+DEFAULT_CODEC = CODEC_ZLIB
+CODECS = {'raw': CODEC_RAW, 'zlib': CODEC_ZLIB, 'lzma': CODEC_LZMA}
+
+MOVE = 0
+CLICK = 1
+
+BUTTON_UNKNOWN = 0
+BUTTON_LEFT = 1
+BUTTON_MIDDLE = 2
+BUTTON_RIGHT = 3
+
+COLUMNS = (('type', 'B'),
+           ('x', 'i'),
+           ('y', 'i'),
+           ('button', 'B'),
+           ('pressed', 'B'),
+           ('ts', 'q'))
+
+EVENT_SIZE = sum(array.array(code).itemsize for _, code in COLUMNS)
+
+_HEADER = struct.Struct('<4sHI')
+_CHUNK = struct.Struct('<I')
+_CHUNK_V3 = struct.Struct('<IBI')
+
+# Legacy JSON recordings stored pynput's platform specific ``Button.value``
+_LEGACY_BUTTONS = {1: BUTTON_LEFT, 2: BUTTON_MIDDLE, 3: BUTTON_RIGHT,
+                   (2, 4): BUTTON_LEFT, (32, 64): BUTTON_MIDDLE, (8, 16): BUTTON_RIGHT}
+
+
+class FormatError(Exception):
+    pass
+
+
+class EventColumns(object):
+    __slots__ = tuple(name for name, _ in COLUMNS)
+
+    def __init__(self):
+        for name, code in COLUMNS:
+            setattr(self, name, array.array(code))
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append_move(self, x, y, ts):
+        self.type.append(MOVE)
+        self.x.append(x)
+        self.y.append(y)
+        self.button.append(BUTTON_UNKNOWN)
+        self.pressed.append(0)
+        self.ts.append(ts)
+
+    def append_click(self, x, y, button, pressed, ts):
+        self.type.append(CLICK)
+        self.x.append(x)
+        self.y.append(y)
+        self.button.append(button)
+        self.pressed.append(1 if pressed else 0)
+        self.ts.append(ts)
+
+    def extend(self, other):
+        for name, _ in COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def slice(self, start, stop):
+        part = EventColumns()
+        for name, _ in COLUMNS:
+            setattr(part, name, getattr(self, name)[start:stop])
+        return part
+
+    def iter_events(self):
+        return zip(self.type, self.x, self.y, self.button, self.pressed, self.ts)
+
+
+class Recording(object):
+    def __init__(self, name='', description='', events=None, created=0):
+        self.name = name
+        self.description = description
+        self.created = created
+        self.events = EventColumns() if events is None else events
+
+
+def convert_epoch_ms(events, base_ms):
+    # Versions before 2 stamped events with wall clock milliseconds since the epoch
+    events.ts = array.array('q', ((ts - base_ms) * 1000000 for ts in events.ts))
+    return events
+
+
+def _raw_columns(events):
+    parts = []
+    for name, _ in COLUMNS:
+        column = getattr(events, name)
+        if sys.byteorder != 'little':
+            column = array.array(column.typecode, column)
+            column.byteswap()
+        parts.append(column.tobytes())
+    return b''.join(parts)
+
+
+def _decode_raw_columns(buf, count):
+    events = EventColumns()
+    offset = 0
+    for name, _ in COLUMNS:
+        column = getattr(events, name)
+        size = count * column.itemsize
+        column.frombytes(buf[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        offset += size
+    return events
+
+
+def encode_chunk(events, codec=DEFAULT_CODEC):
+    if codec == CODEC_RAW:
+        payload = _raw_columns(events)
+    else:
+        payload = encode_columns(events.type, events.x, events.y, events.button, events.pressed, events.ts)
+        payload = zlib.compress(payload, 6) if codec == CODEC_ZLIB else lzma.compress(payload)
+    return _CHUNK_V3.pack(len(events), codec, len(payload)) + payload
+
+
+def chunk_size(buf, offset=0, version=VERSION):
+    header = _CHUNK_V3 if version >= 3 else _CHUNK
+    if offset + header.size > len(buf):
+        raise FormatError('Truncated chunk header')
+    if version >= 3:
+        count, _, size = header.unpack_from(buf, offset)
+        return count, header.size + size
+    count, = header.unpack_from(buf, offset)
+    return count, header.size + count * EVENT_SIZE
+
+
+def decode_chunk(buf, offset=0, version=VERSION):
+    count, size = chunk_size(buf, offset, version)
+    end = offset + size
+    if end > len(buf):
+        raise FormatError('Truncated chunk')
+    if version < 3:
+        return _decode_raw_columns(buf[offset + _CHUNK.size:end], count), end
+
+    codec = buf[offset + 4]
+    payload = buf[offset + _CHUNK_V3.size:end]
+    if codec == CODEC_RAW:
+        return _decode_raw_columns(payload, count), end
+    if codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec == CODEC_LZMA:
+        payload = lzma.decompress(payload)
+    else:
+        raise FormatError('Unknown chunk codec {}'.format(codec))
+    events = EventColumns()
+    events.type, events.x, events.y, events.button, events.pressed, events.ts = decode_columns(payload, count)
+    return events, end
+
+
+def encode_header(name, description, created):
+    meta = json.dumps({'name': name, 'description': description, 'created': created}).encode('utf-8')
+    return _HEADER.pack(MAGIC, VERSION, len(meta)) + meta
+
+
+def decode_header(buf):
+    if len(buf) < _HEADER.size:
+        raise FormatError('Truncated header')
+    magic, version, meta_size = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise FormatError('Not a Cobalt recording')
+    if version not in SUPPORTED_VERSIONS:
+        raise FormatError('Unsupported recording version {}'.format(version))
+    end = _HEADER.size + meta_size
+    if end > len(buf):
+        raise FormatError('Truncated header')
+    meta = json.loads(bytes(buf[_HEADER.size:end]).decode('utf-8'))
+    return version, meta, end
+
+
+def is_legacy(file_name):
+    with open(file_name, 'rb') as f:
+        return f.read(len(MAGIC)) != MAGIC
+
+
+def save_recording(recording, file_name, codec=DEFAULT_CODEC):
+    events = recording.events
+    with open(file_name, 'wb') as f:
+        f.write(encode_header(recording.name, recording.description, recording.created))
+        for start in range(0, len(events), CHUNK_EVENTS):
+            f.write(encode_chunk(events.slice(start, start + CHUNK_EVENTS), codec))
+
+
+class RecordingReader(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.chunks = []
+        self._file = None
+        self._map = None
+        self._legacy = None
+        self._base_ms = None
+        self.version = VERSION
+
+        if is_legacy(file_name):
+            self._legacy = load_legacy_recording(file_name)
+            self.name = self._legacy.name
+            self.description = self._legacy.description
+            self.created = self._legacy.created
+            self.chunks = [(start, min(CHUNK_EVENTS, len(self._legacy.events) - start))
+                           for start in range(0, len(self._legacy.events), CHUNK_EVENTS)]
+            return
+
+        self._file = open(file_name, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        version, meta, offset = decode_header(self._map)
+        self.version = version
+        self.name = meta['name']
+        self.description = meta['description']
+        self.created = meta.get('created', 0)
+        while offset < len(self._map):
+            try:
+                count, size = chunk_size(self._map, offset, version)
+            except FormatError:
+                break
+            # The writer never seals an empty chunk, zeros left at the end by a power loss are not events
+            if count == 0 or offset + size > len(self._map):
+                break
+            self.chunks.append((offset, count))
+            offset += size
+
+        if version < 2:
+            self._base_ms = decode_chunk(self._map, self.chunks[0][0], version)[0].ts[0] if self.chunks else 0
+            self.created = self._base_ms
+
+    def __len__(self):
+        return sum(count for _, count in self.chunks)
+
+    def duration(self):
+        indices = [index for index, (_, count) in enumerate(self.chunks) if count]
+        if not indices:
+            return 0
+        last = self.chunk(indices[-1])
+        first = self.chunk(indices[0]) if len(indices) > 1 else last
+        return last.ts[-1] - first.ts[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def chunk(self, index):
+        offset, count = self.chunks[index]
+        if self._legacy is not None:
+            return self._legacy.events.slice(offset, offset + count)
+        events = decode_chunk(self._map, offset, self.version)[0]
+        if self._base_ms is not None:
+            convert_epoch_ms(events, self._base_ms)
+        return events
+
+    def iter_chunks(self):
+        for index in range(len(self.chunks)):
+            yield self.chunk(index)
+
+
+def load_recording(file_name):
+    with RecordingReader(file_name) as reader:
+        recording = Recording(reader.name, reader.description, created=reader.created)
+        for chunk in reader.iter_chunks():
+            recording.events.extend(chunk)
+    return recording
+
+
+def load_legacy_recording(file_name):
+    with open(file_name, 'r') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise FormatError('Invalid legacy recording: {}'.format(e))
+    if not isinstance(data, dict) or not isinstance(data.get('events', []), list):
+        raise FormatError('Legacy recording is not an object with a list of events')
+    recording = Recording(str(data.get('name', '')), str(data.get('description', '')))
+    try:
+        for event in data.get('events', []):
+            if event['type'] == MOVE:
+                recording.events.append_move(event['x'], event['y'], event['ts'])
+            else:
+                button = event['button']
+                button = tuple(button) if isinstance(button, list) else button
+                recording.events.append_click(event['x'], event['y'], _LEGACY_BUTTONS.get(button, BUTTON_MIDDLE),
+                                              event['pressed'], event['ts'])
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise FormatError('Invalid legacy event: {!r}'.format(e))
+    if len(recording.events) > 0:
+        recording.created = recording.events.ts[0]
+        convert_epoch_ms(recording.events, recording.created)
+    return recording
+
+
+def recording_file_name(name, stamp):
+    return name + '_' + stamp + EXTENSION
@@ -0,0 +1,56 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+
+class RecordListModel(QAbstractListModel):
+    BATCH_SIZE = 200
+
+    def __init__(self, catalog, parent=None):
+        QAbstractListModel.__init__(self, parent)
+        self.catalog = catalog
+        self.filter_text = ''
+        self.rows = []
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        record = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return record['name'] + ': ' + record['description']
+        if role == Qt.ToolTipRole:
+            return record['file_name']
+        if role == Qt.UserRole:
+            return record['id']
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        batch = self.catalog.records(len(self.rows), self.BATCH_SIZE, self.filter_text)
+        self.exhausted = len(batch) < self.BATCH_SIZE
+        if not batch:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(batch) - 1)
+        self.rows.extend(batch)
+        self.endInsertRows()
+
+    def set_filter(self, text):
+        if text == self.filter_text:
+            return
+        self.beginResetModel()
+        self.filter_text = text
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def add_record(self, record):
+        if self.exhausted and self.catalog.matches(record['id'], self.filter_text):
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows))
+            self.rows.append(record)
+            self.endInsertRows()
@@ -0,0 +1,87 @@
+import queue
+import threading
+import traceback
+
+from catalog import CATALOG_FILE, RecordCatalog, recording_stats
+
+# Percent of the save given to writing the file and to simplifying it, the catalog update takes the rest
+WRITE_SHARE = 60
+SIMPLIFY_SHARE = 30
+
+
+class SaveJob(object):
+    def __init__(self, recorder, on_progress=None, on_done=None):
+        self.recorder = recorder
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.file_name = None
+        self.record = None
+        self.error = None
+        self.last_progress = None
+
+    def progress(self, percent, stage):
+        if self.on_progress is not None and (percent, stage) != self.last_progress:
+            self.last_progress = (percent, stage)
+            self.on_progress(self, percent, stage)
+
+    def run(self, catalog):
+        recorder = self.recorder
+        self.progress(0, 'Запись файла')
+        recorder.writer.on_chunk = lambda written, queued: self.progress(WRITE_SHARE * written // max(queued, 1),
+                                                                          'Запись файла')
+        self.file_name = recorder.finish()
+        if recorder.simplify_epsilon > 0:
+            self.progress(WRITE_SHARE, 'Упрощение пути')
+            recorder.simplify()
+        self.progress(WRITE_SHARE + SIMPLIFY_SHARE, 'Каталог')
+        self.record = catalog.add(recorder.name, recorder.description, self.file_name, recorder.stats())
+        self.progress(100, 'Готово')
+
+
+class RecordSaver(threading.Thread):
+    def __init__(self, catalog_path=CATALOG_FILE):
+        threading.Thread.__init__(self, name='RecordSaver')
+        self.daemon = True
+        self.catalog_path = catalog_path
+        self.jobs = queue.Queue()
+
+    def submit(self, job):
+        self.jobs.put(job)
+        return job
+
+    def stop(self):
+        self.jobs.put(None)
+        self.join()
+
+    def run(self):
+        # SQLite connections belong to the thread that opened them, so the saver keeps its own
+        catalog = RecordCatalog(self.catalog_path)
+        try:
+            pending = catalog.pending_stats()
+            pending.reverse()
+        except Exception:
+            traceback.print_exc()
+            pending = []
+        try:
+            while True:
+                try:
+                    job = self.jobs.get(block=not pending)
+                except queue.Empty:
+                    # Imported records get their stats one file at a time while there is nothing to save
+                    record_id, file_name = pending.pop()
+                    try:
+                        catalog.update_stats(record_id, recording_stats(file_name))
+                    except Exception:
+                        traceback.print_exc()
+                    continue
+                if job is None:
+                    break
+                try:
+                    job.run(catalog)
+                except Exception as e:
+                    traceback.print_exc()
+                    job.error = e
+                if job.on_done is not None:
+                    job.on_done(job)
+        finally:
+            catalog.close()
@@ -0,0 +1,123 @@
+import os
+import queue
+import threading
+
+from recordformat import CHUNK_EVENTS, EVENT_SIZE, EventColumns, encode_chunk, encode_header
+
+# How often a producer blocked on a full queue checks that the writer thread is still there to empty it
+STALL_CHECK = 0.1
+
+
+def pending_chunks(memory_limit, chunk_events=CHUNK_EVENTS):
+    # The chunk being filled and the one being encoded are always in memory on top of the queued ones
+    if memory_limit is None:
+        return 0
+    return max(1, memory_limit // (chunk_events * EVENT_SIZE) - 2)
+
+
+class RecordingWriter(object):
+    def __init__(self, file_name, name, description, created, chunk_events=CHUNK_EVENTS, memory_limit=None):
+        self.file_name = file_name
+        self.created = created
+        self.chunk_events = chunk_events
+        self.events = EventColumns()
+        self.written = 0
+        self.chunks_queued = 0
+        self.chunks_written = 0
+        self.max_pending = pending_chunks(memory_limit, chunk_events)
+        self.stalls = 0
+        self.on_chunk = None
+        self.clicks = 0
+        self.first_ts = None
+        self.last_ts = 0
+        self.error = None
+
+        self._file = open(file_name, 'wb')
+        self._file.write(encode_header(name, description, created))
+        self._file.flush()
+
+        self._queue = queue.Queue(self.max_pending)
+        self._thread = threading.Thread(target=self._run, name='RecordingWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __len__(self):
+        return self.written + len(self.events)
+
+    def stats(self):
+        duration = self.last_ts - self.first_ts if self.first_ts is not None else 0
+        return self.created, duration, self.written, self.clicks
+
+    def append_move(self, x, y, ts):
+        self.events.append_move(x, y, ts)
+        if len(self.events) >= self.chunk_events:
+            self.flush()
+
+    def append_click(self, x, y, button, pressed, ts):
+        self.events.append_click(x, y, button, pressed, ts)
+        if len(self.events) >= self.chunk_events:
+            self.flush()
+
+    def extend(self, events):
+        self.events.extend(events)
+        while len(self.events) >= self.chunk_events:
+            self.written += self.chunk_events
+            self._seal(self.events.slice(0, self.chunk_events))
+            self.events = self.events.slice(self.chunk_events, len(self.events))
+
+    def flush(self):
+        if len(self.events) > 0:
+            self.written += len(self.events)
+            self._seal(self.events)
+            self.events = EventColumns()
+
+    def _put(self, item):
+        # A writer that died on an I/O error never empties the queue again, close() reports the error instead
+        while self.error is None and self._thread.is_alive():
+            try:
+                self._queue.put(item, timeout=STALL_CHECK)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _seal(self, chunk):
+        self.chunks_queued += 1
+        if self.error is not None:
+            return
+        try:
+            self._queue.put_nowait(chunk)
+            return
+        except queue.Full:
+            # The disk is behind and the memory ceiling is reached, the producer waits instead of buffering more
+            self.stalls += 1
+        self._put(chunk)
+
+    def close(self):
+        self.flush()
+        self._put(None)
+        self._thread.join()
+        self._file.close()
+        if self.error is not None:
+            # Everything after the failed chunk is lost, the caller must not treat the file as a complete recording
+            raise self.error
+
+    def _run(self):
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                self._file.write(encode_chunk(chunk))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                if self.first_ts is None:
+                    self.first_ts = chunk.ts[0]
+                self.last_ts = chunk.ts[-1]
+                self.clicks += chunk.pressed.count(1)
+                self.chunks_written += 1
+                if self.on_chunk is not None:
+                    self.on_chunk(self.chunks_written, self.chunks_queued)
+        except Exception as e:
+            # Kept for close(), producers stop waiting on the queue as soon as it is set
+            self.error = e
@@ -0,0 +1,103 @@
+import array
+import threading
+
+from recordformat import BUTTON_UNKNOWN, CLICK, COLUMNS, MOVE, EventColumns
+
+RING_CAPACITY = 1 << 16
+DRAIN_INTERVAL = 0.005
+# Moves stop this many slots short of a full ring, so presses and releases still fit while the drainer is behind
+CLICK_RESERVE = 64
+
+
+class EventRing(object):
+    def __init__(self, capacity=RING_CAPACITY):
+        if capacity & (capacity - 1):
+            raise ValueError('Ring capacity must be a power of two')
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.move_limit = capacity - min(CLICK_RESERVE, capacity // 4)
+        for name, code in COLUMNS:
+            setattr(self, name, array.array(code, [0]) * capacity)
+        # Only the producer advances head and only the consumer advances tail
+        self.head = 0
+        self.tail = 0
+        self.overflows = 0
+        self.click_overflows = 0
+        self.high_water = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push_move(self, x, y, ts):
+        head = self.head
+        if head - self.tail >= self.move_limit:
+            self.overflows += 1
+            return False
+        idx = head & self.mask
+        self.type[idx] = MOVE
+        self.x[idx] = x
+        self.y[idx] = y
+        self.button[idx] = BUTTON_UNKNOWN
+        self.pressed[idx] = 0
+        self.ts[idx] = ts
+        self.head = head + 1
+        return True
+
+    def push_click(self, x, y, button, pressed, ts):
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.click_overflows += 1
+            return False
+        idx = head & self.mask
+        self.type[idx] = CLICK
+        self.x[idx] = x
+        self.y[idx] = y
+        self.button[idx] = button
+        self.pressed[idx] = 1 if pressed else 0
+        self.ts[idx] = ts
+        self.head = head + 1
+        return True
+
+    def _slice(self, start, stop):
+        part = EventColumns()
+        for name, _ in COLUMNS:
+            setattr(part, name, getattr(self, name)[start:stop])
+        return part
+
+    def drain(self, sink):
+        head = self.head
+        tail = self.tail
+        count = head - tail
+        if count == 0:
+            return 0
+        if count > self.high_water:
+            self.high_water = count
+
+        start = tail & self.mask
+        stop = start + count
+        if stop <= self.capacity:
+            sink.extend(self._slice(start, stop))
+        else:
+            sink.extend(self._slice(start, self.capacity))
+            sink.extend(self._slice(0, stop - self.capacity))
+        self.tail = head
+        return count
+
+
+class RingDrainer(threading.Thread):
+    def __init__(self, ring, sink, interval=DRAIN_INTERVAL):
+        threading.Thread.__init__(self, name='RingDrainer')
+        self.daemon = True
+        self.ring = ring
+        self.sink = sink
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.ring.drain(self.sink)
+        self.ring.drain(self.sink)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
@@ -0,0 +1,39 @@
+import array
+import threading
+import time
+
+SPIN_NS = 2000000
+
+
+class DeadlineScheduler(object):
+    def __init__(self, spin_ns=SPIN_NS, clock=time.monotonic_ns, cancelled=None):
+        self.spin_ns = spin_ns
+        self.clock = clock
+        self.cancelled = cancelled if cancelled is not None else threading.Event()
+        self.start = None
+        self.last_lateness = 0
+        self.lateness = array.array('q')
+
+    def begin(self, start=None):
+        self.start = start if start is not None else self.clock()
+        self.last_lateness = 0
+        self.lateness = array.array('q')
+
+    def wait(self, offset_ns):
+        if self.cancelled.is_set():
+            return None
+        deadline = self.start + offset_ns
+        now = self.clock()
+        remaining = deadline - now
+        if remaining > self.spin_ns:
+            # Sleeping on the cancel event lets a long idle gap be interrupted
+            if self.cancelled.wait((remaining - self.spin_ns) / 1e9):
+                return None
+            now = self.clock()
+        while now < deadline:
+            now = self.clock()
+
+        lateness = now - deadline
+        self.lateness.append(lateness)
+        self.last_lateness = lateness
+        return lateness
@@ -19,9 +19,14 @@ class Ui_WidgetSelectRecord(object):
         self.verticalLayout.setContentsMargins(11, 11, 11, 11)
         self.verticalLayout.setSpacing(6)
         self.verticalLayout.setObjectName("verticalLayout")
-        self.listWidgetSelect = QtWidgets.QListWidget(WidgetSelectRecord)
-        self.listWidgetSelect.setObjectName("listWidgetSelect")
-        self.verticalLayout.addWidget(self.listWidgetSelect)
+        self.lineEditFilter = QtWidgets.QLineEdit(WidgetSelectRecord)
+        self.lineEditFilter.setClearButtonEnabled(True)
+        self.lineEditFilter.setObjectName("lineEditFilter")
+        self.verticalLayout.addWidget(self.lineEditFilter)
+        self.listViewSelect = QtWidgets.QListView(WidgetSelectRecord)
+        self.listViewSelect.setUniformItemSizes(True)
+        self.listViewSelect.setObjectName("listViewSelect")
+        self.verticalLayout.addWidget(self.listViewSelect)
         self.pushButtonStart = QtWidgets.QPushButton(WidgetSelectRecord)
         self.pushButtonStart.setObjectName("pushButtonStart")
         self.verticalLayout.addWidget(self.pushButtonStart)
@@ -32,6 +37,7 @@ class Ui_WidgetSelectRecord(object):
     def retranslateUi(self, WidgetSelectRecord):
         _translate = QtCore.QCoreApplication.translate
         WidgetSelectRecord.setWindowTitle(_translate("WidgetSelectRecord", "Выбери запись"))
+        self.lineEditFilter.setPlaceholderText(_translate("WidgetSelectRecord", "Поиск"))
         self.pushButtonStart.setText(_translate("WidgetSelectRecord", "Старт"))
 
 import resources_rc
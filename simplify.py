@@ -0,0 +1,99 @@
+import array
+import itertools
+import math
+import os
+
+from recordformat import CHUNK_EVENTS, CLICK, COLUMNS, DEFAULT_CODEC, EventColumns, RecordingReader, encode_chunk, \
+    encode_header, is_legacy
+
+DEFAULT_EPSILON = 1.0
+
+
+def _farthest(x, y, first, last):
+    ax, ay = x[first], y[first]
+    dx, dy = x[last] - ax, y[last] - ay
+    length_sq = dx * dx + dy * dy
+    xs = x[first + 1:last]
+    ys = y[first + 1:last]
+    if length_sq == 0:
+        distances = [(px - ax) ** 2 + (py - ay) ** 2 for px, py in zip(xs, ys)]
+    else:
+        # Squared distance to the segment, the projection is clamped so that backtracking is not underestimated
+        distances = [(px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+                     for px, py, t in ((px, py, min(1.0, max(0.0, ((px - ax) * dx + (py - ay) * dy) / length_sq)))
+                                       for px, py in zip(xs, ys))]
+    index = max(range(len(distances)), key=distances.__getitem__)
+    return first + 1 + index, distances[index]
+
+
+def simplify_path(x, y, first, last, epsilon, keep):
+    epsilon_sq = epsilon * epsilon
+    deviation_sq = 0.0
+    stack = [(first, last)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        index, distance_sq = _farthest(x, y, first, last)
+        if distance_sq > epsilon_sq:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+        elif distance_sq > deviation_sq:
+            deviation_sq = distance_sq
+    return math.sqrt(deviation_sq)
+
+
+def simplify_events(events, epsilon=DEFAULT_EPSILON):
+    count = len(events)
+    if count < 3:
+        return events, 0, 0.0
+
+    # Clicks and both ends are fixed, moves in between are simplified one stretch at a time
+    keep = bytearray(count)
+    anchors = [idx for idx, event_type in enumerate(events.type) if event_type == CLICK]
+    anchors = sorted(set([0, count - 1] + anchors))
+    for idx in anchors:
+        keep[idx] = 1
+    deviation = 0.0
+    for first, last in zip(anchors, anchors[1:]):
+        deviation = max(deviation, simplify_path(events.x, events.y, first, last, epsilon, keep))
+
+    simplified = EventColumns()
+    for name, code in COLUMNS:
+        setattr(simplified, name, array.array(code, itertools.compress(getattr(events, name), keep)))
+    return simplified, count - len(simplified), deviation
+
+
+def simplify_file(file_name, epsilon=DEFAULT_EPSILON, codec=DEFAULT_CODEC):
+    if is_legacy(file_name):
+        raise ValueError('{} is a legacy recording, migrate it first'.format(file_name))
+
+    # One chunk at a time so that memory stays bounded for recordings of any length, chunk ends are kept as anchors
+    count = removed = 0
+    deviation = 0.0
+    temp_file_name = file_name + '.tmp'
+    with RecordingReader(file_name) as reader, open(temp_file_name, 'wb') as f:
+        f.write(encode_header(reader.name, reader.description, reader.created))
+        pending = EventColumns()
+        for chunk in reader.iter_chunks():
+            simplified, chunk_removed, chunk_deviation = simplify_events(chunk, epsilon)
+            count += len(chunk)
+            removed += chunk_removed
+            deviation = max(deviation, chunk_deviation)
+            pending.extend(simplified)
+            while len(pending) >= CHUNK_EVENTS:
+                f.write(encode_chunk(pending.slice(0, CHUNK_EVENTS), codec))
+                pending = pending.slice(CHUNK_EVENTS, len(pending))
+        if len(pending):
+            f.write(encode_chunk(pending, codec))
+    if removed:
+        os.replace(temp_file_name, file_name)
+    else:
+        os.remove(temp_file_name)
+    return count, removed, deviation
+
+
+def simplify_summary(events, removed, deviation):
+    return 'Удалено событий: {} из {} ({:.1f}%), максимальное отклонение {:.2f} пкс'.format(
+        removed, events, 100.0 * removed / events if events else 0.0, deviation)
@@ -0,0 +1,54 @@
+import array
+
+from deltacodec import decode_columns, deltas, encode_columns, read_varints, write_varints
+
+
+def columns(x, y, ts):
+    count = len(ts)
+    return (array.array('B', [0] * count), array.array('i', x), array.array('i', y), array.array('B', [0] * count),
+            array.array('B', [0] * count), array.array('q', ts))
+
+
+def test_deltas():
+    assert deltas([5, 7, 4]) == [5, 2, -3]
+    assert deltas([0, 10, 20, 35], 2) == [0, 10, 0, 5]
+
+
+def test_varints_round_trip():
+    values = [0, 1, -1, 63, -64, 64, -65, 2 ** 31 - 1, -2 ** 31, 2 ** 62, -2 ** 62]
+    out = bytearray()
+    write_varints(values, out)
+    decoded, offset = read_varints(out, 0, len(values))
+    assert decoded == values
+    assert offset == len(out)
+
+
+def test_small_varints_take_one_byte():
+    out = bytearray()
+    write_varints([0, 1, -1, 63, -64], out)
+    assert len(out) == 5
+
+
+def test_columns_round_trip_negative_coordinates():
+    original = columns([-1920, -1919, 0, 2559, -5], [-1080, 1079, -1, 0, -32768], [0, 8, 16, 24, 32])
+    kind, x, y, button, pressed, ts = decode_columns(encode_columns(*original), 5)
+    assert (kind, x, y, button, pressed, ts) == original
+    assert x.typecode == 'i' and ts.typecode == 'q'
+
+
+def test_columns_round_trip_large_timestamp_jumps():
+    ts = [0, 1000000, 2000000, 3600 * 10 ** 9, 3600 * 10 ** 9 + 1, 2 ** 62, 2 ** 62 + 7]
+    original = columns([0] * len(ts), [0] * len(ts), ts)
+    assert decode_columns(encode_columns(*original), len(ts)) == original
+
+
+def test_columns_round_trip_mixed_events():
+    original = (array.array('B', [0, 1, 1, 0]), array.array('i', [10, 10, 10, 12]), array.array('i', [3, 3, 3, 1]),
+                array.array('B', [0, 1, 1, 0]), array.array('B', [0, 1, 0, 0]), array.array('q', [5, 9, 12, 100]))
+    assert decode_columns(encode_columns(*original), 4) == original
+
+
+def test_empty_columns():
+    original = columns([], [], [])
+    assert encode_columns(*original) == b''
+    assert decode_columns(b'', 0) == original
@@ -0,0 +1,68 @@
+import array
+
+import pytest
+
+from playback import PlanChunk, PlaybackOptions, PlaybackPlan, TimingProfile, estimate_duration, retime
+from recordformat import CLICK, MOVE
+
+
+class ListSource(object):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_chunks(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+def make_plan(kinds, deadlines, chunk_size=3):
+    chunks = []
+    for start in range(0, len(kinds), chunk_size):
+        count = len(kinds[start:start + chunk_size])
+        chunks.append(PlanChunk(array.array('B', kinds[start:start + chunk_size]), array.array('i', [0] * count),
+                                array.array('i', [0] * count), array.array('q', deadlines[start:start + chunk_size]),
+                                array.array('B', [0] * count), array.array('B', [0] * count)))
+    plan = PlaybackPlan('', '', 0, 0, [len(chunk) for chunk in chunks], deadlines[-1] - deadlines[0], (None,) * 256,
+                        ListSource(chunks))
+    profile = TimingProfile()
+    for chunk in chunks:
+        profile.add(chunk)
+    return plan, profile
+
+
+MS = 1000000
+KINDS = [MOVE, MOVE, CLICK, CLICK, MOVE, MOVE, MOVE, CLICK, MOVE]
+DEADLINES = [0, 8 * MS, 9 * MS, 700 * MS, 708 * MS, 5000 * MS, 5020 * MS, 5021 * MS, 5030 * MS]
+OPTIONS = [PlaybackOptions(), PlaybackOptions(2.0), PlaybackOptions(1.0, 0.05), PlaybackOptions(0.5, 5),
+           PlaybackOptions(1.5, 20), PlaybackOptions(1.0, 500), PlaybackOptions(fast=True),
+           PlaybackOptions(3.0, 100, True, 5)]
+
+
+def test_profile():
+    _, profile = make_plan(KINDS, DEADLINES)
+    assert profile.settle_gaps == 5
+    assert list(profile.long_gaps) == [691 * MS, 4292 * MS, 20 * MS]
+    assert profile.short_gaps == 5
+    assert profile.short_total == (8 + 1 + 8 + 1 + 9) * MS
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_estimate_with_profile(options):
+    plan, profile = make_plan(KINDS, DEADLINES)
+    plan.profile = profile
+    actual = list(retime(plan, options).deadlines())[-1]
+    duration, exact = estimate_duration(retime(plan, options), options)
+    if exact:
+        assert abs(duration - actual) <= len(plan)
+    else:
+        assert duration >= actual
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_estimate_without_profile_is_an_upper_bound(options):
+    plan, _ = make_plan(KINDS, DEADLINES)
+    actual = list(retime(plan, options).deadlines())[-1]
+    duration, exact = estimate_duration(retime(plan, options), options)
+    assert duration >= actual if not exact else abs(duration - actual) <= len(plan)
@@ -0,0 +1,141 @@
+import array
+import json
+
+import pytest
+
+from recordformat import BUTTON_LEFT, BUTTON_MIDDLE, BUTTON_RIGHT, CHUNK_EVENTS, CLICK, CODEC_LZMA, CODEC_RAW, \
+    CODEC_ZLIB, MAGIC, MOVE, FormatError, Recording, RecordingReader, _CHUNK, _HEADER, _raw_columns, \
+    encode_chunk, load_recording, save_recording
+
+
+def sample_recording(count=10, start=0):
+    recording = Recording('name', 'описание', created=1580000000000)
+    for index in range(count):
+        ts = start + index * 8000000
+        if index % 5 == 4:
+            recording.events.append_click(index, -index, BUTTON_LEFT, index % 10 == 4, ts)
+        else:
+            recording.events.append_move(index * 3 - 100, -index * 7, ts)
+    return recording
+
+
+def columns(events):
+    return (list(events.type), list(events.x), list(events.y), list(events.button), list(events.pressed),
+            list(events.ts))
+
+
+def write_raw(file_name, version, recording, epoch_base=1580000000000):
+    # Versions 1 and 2 wrote the columns uncompressed behind a plain event count
+    meta = json.dumps({'name': recording.name, 'description': recording.description}).encode('utf-8')
+    events = recording.events.slice(0, len(recording.events))
+    if version < 2:
+        # Version 1 stamped events with wall clock milliseconds
+        events.ts = array.array('q', (ts // 1000000 + epoch_base for ts in events.ts))
+    with open(file_name, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, version, len(meta)) + meta)
+        for start in range(0, len(events), CHUNK_EVENTS):
+            part = events.slice(start, start + CHUNK_EVENTS)
+            f.write(_CHUNK.pack(len(part)) + _raw_columns(part))
+
+
+@pytest.mark.parametrize('codec', [CODEC_RAW, CODEC_ZLIB, CODEC_LZMA])
+def test_version_3_round_trip(tmp_path, codec):
+    file_name = str(tmp_path / 'a.cobalt')
+    recording = sample_recording(CHUNK_EVENTS * 2 + 10)
+    save_recording(recording, file_name, codec)
+    loaded = load_recording(file_name)
+    assert (loaded.name, loaded.description, loaded.created) == ('name', 'описание', 1580000000000)
+    assert columns(loaded.events) == columns(recording.events)
+    with RecordingReader(file_name) as reader:
+        assert [count for _, count in reader.chunks] == [CHUNK_EVENTS, CHUNK_EVENTS, 10]
+        assert reader.duration() == recording.events.ts[-1]
+
+
+def test_empty_recording(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    save_recording(Recording('empty'), file_name)
+    with RecordingReader(file_name) as reader:
+        assert len(reader) == 0
+        assert reader.duration() == 0
+
+
+def test_version_2(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    recording = sample_recording(CHUNK_EVENTS + 3)
+    write_raw(file_name, 2, recording)
+    with RecordingReader(file_name) as reader:
+        assert reader.version == 2
+        assert len(reader) == CHUNK_EVENTS + 3
+    assert columns(load_recording(file_name).events) == columns(recording.events)
+
+
+def test_version_1_converts_epoch_milliseconds(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    recording = sample_recording(20)
+    write_raw(file_name, 1, recording)
+    loaded = load_recording(file_name)
+    assert loaded.created == 1580000000000
+    assert columns(loaded.events) == columns(recording.events)
+
+
+def test_legacy_json(tmp_path):
+    file_name = str(tmp_path / 'a.json')
+    events = [{'type': MOVE, 'x': -5, 'y': 7, 'ts': 1580000000000},
+              {'type': CLICK, 'x': 1, 'y': 2, 'button': 1, 'pressed': True, 'ts': 1580000000010},
+              {'type': CLICK, 'x': 1, 'y': 2, 'button': [8, 16], 'pressed': False, 'ts': 1580000000020},
+              {'type': CLICK, 'x': 1, 'y': 2, 'button': 99, 'pressed': True, 'ts': 1580000000030}]
+    with open(file_name, 'w') as f:
+        json.dump({'name': 'old', 'description': 'd', 'events': events}, f)
+    loaded = load_recording(file_name)
+    assert (loaded.name, loaded.description, loaded.created) == ('old', 'd', 1580000000000)
+    assert columns(loaded.events) == ([MOVE, CLICK, CLICK, CLICK], [-5, 1, 1, 1], [7, 2, 2, 2],
+                                      [0, BUTTON_LEFT, BUTTON_RIGHT, BUTTON_MIDDLE], [0, 1, 0, 1],
+                                      [0, 10000000, 20000000, 30000000])
+
+
+def test_zero_filled_tail_is_ignored(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    recording = sample_recording(CHUNK_EVENTS + 10)
+    save_recording(recording, file_name)
+    # A power loss can leave preallocated blocks full of zeros behind the last sealed chunk
+    with open(file_name, 'ab') as f:
+        f.write(b'\0' * 4096)
+    assert columns(load_recording(file_name).events) == columns(recording.events)
+
+
+def test_truncated_chunk_is_dropped(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    recording = sample_recording(CHUNK_EVENTS + 10)
+    save_recording(recording, file_name)
+    with open(file_name, 'ab') as f:
+        chunk = encode_chunk(sample_recording(100, recording.events.ts[-1] + 1).events)
+        f.write(chunk[:len(chunk) // 2])
+    with RecordingReader(file_name) as reader:
+        assert len(reader) == CHUNK_EVENTS + 10
+    assert columns(load_recording(file_name).events) == columns(recording.events)
+
+
+def test_truncated_chunk_header_is_dropped(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    save_recording(sample_recording(10), file_name)
+    with open(file_name, 'ab') as f:
+        f.write(b'\1\0')
+    assert len(load_recording(file_name).events) == 10
+
+
+def test_not_a_recording(tmp_path):
+    file_name = str(tmp_path / 'a.cobalt')
+    with open(file_name, 'wb') as f:
+        f.write(MAGIC + b'\x09\x00\x00\x00\x00\x00')
+    with pytest.raises(FormatError):
+        RecordingReader(file_name)
+
+
+@pytest.mark.parametrize('data', [[], {'events': 5}, {'events': [{'type': MOVE}]}, {'events': [3]},
+                                  {'events': [{'type': MOVE, 'x': 2 ** 40, 'y': 0, 'ts': 0}]}])
+def test_malformed_legacy_json(tmp_path, data):
+    file_name = str(tmp_path / 'a.json')
+    with open(file_name, 'w') as f:
+        json.dump(data, f)
+    with pytest.raises(FormatError):
+        load_recording(file_name)
@@ -0,0 +1,63 @@
+import itertools
+import json
+
+from measure import percentile
+
+SEGMENT_EVENTS = 100
+WORST_SEGMENTS = 5
+HISTOGRAM_BUCKETS_US = (1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+
+def timing_report(deadlines, lateness, segment_events=SEGMENT_EVENTS):
+    count = len(lateness)
+    if count == 0:
+        return {'events': 0}
+
+    ordered = sorted(lateness)
+    histogram = [0] * (len(HISTOGRAM_BUCKETS_US) + 1)
+    for value in ordered:
+        us = value / 1000.0
+        bucket = 0
+        while bucket < len(HISTOGRAM_BUCKETS_US) and us >= HISTOGRAM_BUCKETS_US[bucket]:
+            bucket += 1
+        histogram[bucket] += 1
+
+    # Deadlines may be streamed from the plan chunk by chunk, only the first of every segment is needed
+    segments = []
+    offsets = itertools.islice(deadlines, 0, None, segment_events)
+    for start, offset in zip(range(0, count, segment_events), offsets):
+        part = lateness[start:start + segment_events]
+        segments.append({'first_event': start,
+                         'last_event': start + len(part) - 1,
+                         'offset_ms': offset / 1e6,
+                         'max_us': max(part) / 1000.0,
+                         'mean_us': sum(part) / len(part) / 1000.0})
+    segments.sort(key=lambda segment: segment['max_us'], reverse=True)
+
+    labels = ['<{}us'.format(limit) for limit in HISTOGRAM_BUCKETS_US] + \
+        ['>={}us'.format(HISTOGRAM_BUCKETS_US[-1])]
+    return {'events': count,
+            'p50_us': percentile(ordered, 0.5) / 1000.0,
+            'p90_us': percentile(ordered, 0.9) / 1000.0,
+            'p99_us': percentile(ordered, 0.99) / 1000.0,
+            'max_us': ordered[-1] / 1000.0,
+            'mean_us': sum(ordered) / count / 1000.0,
+            'end_us': lateness[-1] / 1000.0,
+            'histogram': dict(zip(labels, histogram)),
+            'worst_segments': segments[:WORST_SEGMENTS]}
+
+
+def report_file_name(file_name):
+    return file_name + '.timing.json'
+
+
+def save_report(report, file_name):
+    with open(report_file_name(file_name), 'w') as f:
+        json.dump(report, f, indent=True)
+
+
+def report_summary(report):
+    if not report.get('events'):
+        return ''
+    return 'Опоздание: p50 {:.3f} мс, p99 {:.3f} мс, максимальное {:.3f} мс, в конце {:.3f} мс'.format(
+        report['p50_us'] / 1000, report['p99_us'] / 1000, report['max_us'] / 1000, report['end_us'] / 1000)
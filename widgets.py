@@ -0,0 +1,160 @@
+from PyQt5.QtCore import Qt, pyqtSignal, QRegularExpression, QSettings
+from PyQt5.QtWidgets import QAbstractItemView, QWidget
+
+from capturepolicy import CapturePolicy
+from engine import MEMORY_LIMIT
+from playback import SETTLE_MS, PlaybackOptions
+from mainwidget import Ui_MainWidget
+from selectrecord import Ui_WidgetSelectRecord
+from startrecord import Ui_WidgetStartRecord
+
+
+def settings():
+    return QSettings('Ingener74', 'Cobalt')
+
+
+def load_capture_policy():
+    values = settings()
+    return CapturePolicy(int(values.value('capture/max_rate', 0)),
+                         int(values.value('capture/min_distance', 0)),
+                         float(values.value('capture/min_interval_ms', 0.0)))
+
+
+def load_simplify_epsilon():
+    return float(settings().value('capture/simplify_epsilon', 0.0))
+
+
+def load_memory_limit():
+    return int(settings().value('capture/memory_limit_mb', MEMORY_LIMIT // 2 ** 20)) * 2 ** 20
+
+
+def load_playback_options():
+    values = settings()
+    return PlaybackOptions(float(values.value('playback/speed', 1.0)),
+                           float(values.value('playback/max_gap_ms', 0.0)),
+                           values.value('playback/fast', 'false') == 'true',
+                           int(values.value('playback/settle_ms', SETTLE_MS)))
+
+
+class MainWidget(QWidget, Ui_MainWidget):
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent, Qt.Window)
+        self.setupUi(self)
+
+        policy = load_capture_policy()
+        self.spinBoxMaxRate.setValue(policy.max_rate)
+        self.spinBoxMinDistance.setValue(policy.min_distance)
+        self.spinBoxMinInterval.setValue(policy.min_interval_ms)
+        self.spinBoxMaxRate.valueChanged.connect(lambda value: settings().setValue('capture/max_rate', value))
+        self.spinBoxMinDistance.valueChanged.connect(lambda value: settings().setValue('capture/min_distance', value))
+        self.spinBoxMinInterval.valueChanged.connect(
+            lambda value: settings().setValue('capture/min_interval_ms', value))
+        self.spinBoxSimplify.setValue(load_simplify_epsilon())
+        self.spinBoxSimplify.valueChanged.connect(
+            lambda value: settings().setValue('capture/simplify_epsilon', value))
+        self.spinBoxMemoryLimit.setValue(load_memory_limit() // 2 ** 20)
+        self.spinBoxMemoryLimit.valueChanged.connect(
+            lambda value: settings().setValue('capture/memory_limit_mb', value))
+
+        options = load_playback_options()
+        self.spinBoxSpeed.setValue(options.speed)
+        self.spinBoxMaxGap.setValue(options.max_gap_ms / 1000.0)
+        self.checkBoxFast.setChecked(options.fast)
+        self.spinBoxSettle.setValue(options.settle_ms)
+        self.on_fast_toggled(options.fast)
+        self.spinBoxSpeed.valueChanged.connect(lambda value: settings().setValue('playback/speed', value))
+        self.spinBoxMaxGap.valueChanged.connect(
+            lambda value: settings().setValue('playback/max_gap_ms', value * 1000.0))
+        self.checkBoxFast.toggled.connect(self.on_fast_toggled)
+        self.spinBoxSettle.valueChanged.connect(lambda value: settings().setValue('playback/settle_ms', value))
+
+    def on_fast_toggled(self, checked):
+        settings().setValue('playback/fast', 'true' if checked else 'false')
+        self.spinBoxSpeed.setEnabled(not checked)
+        self.spinBoxMaxGap.setEnabled(not checked)
+        self.spinBoxSettle.setEnabled(checked)
+
+    def keyPressEvent(self, q_key_event):
+        if q_key_event.key() == Qt.Key_Escape:
+            self.hide()
+
+    def closeEvent(self, q_close_event):
+        self.hide()
+        q_close_event.ignore()
+
+
+class StartRecordWidget(QWidget, Ui_WidgetStartRecord):
+    on_start = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent, Qt.Window)
+        self.setupUi(self)
+        self.re = QRegularExpression('[_a-zA-Z0-9]+')
+        self.pushButtonStart.clicked.connect(self.on_start_clicked)
+        self.pushButtonStart.setEnabled(False)
+        self.lineEditName.textChanged.connect(self.on_name_changed)
+
+    def on_start_clicked(self):
+        if len(self.lineEditName.text()) > 0:
+            self.on_start.emit(self.lineEditName.text(), self.textEditDescription.toPlainText())
+            self.hide()
+
+    def on_name_changed(self, text):
+        match = self.re.match(text)
+        match_captured_text = match.hasMatch() and match.captured(0) == text
+        self.pushButtonStart.setEnabled(match_captured_text)
+        self.lineEditName.setStyleSheet('background-color: #48FA7E' if match_captured_text else
+                                        'background-color: #FA4848')
+
+    def keyPressEvent(self, q_key_event):
+        if q_key_event.key() == Qt.Key_Escape:
+            self.hide()
+
+    def showEvent(self, q_show_event):
+        self.lineEditName.clear()
+        self.textEditDescription.clear()
+
+    def closeEvent(self, q_close_event):
+        self.hide()
+        q_close_event.ignore()
+
+
+class SelectRecordWidget(QWidget, Ui_WidgetSelectRecord):
+    on_play_selected = pyqtSignal(list)
+
+    def __init__(self, parent=None, model=None):
+        QWidget.__init__(self, parent, Qt.Window)
+        self.setupUi(self)
+        self.pushButtonStart.setEnabled(False)
+        self.listViewSelect.setModel(model)
+        self.listViewSelect.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        self.lineEditFilter.textChanged.connect(self.on_filter_changed)
+        self.listViewSelect.clicked.connect(self.item_clicked)
+        self.listViewSelect.doubleClicked.connect(self.item_dbl_clicked)
+        self.pushButtonStart.clicked.connect(self.on_start_play)
+
+    def closeEvent(self, q_close_event):
+        self.hide()
+        q_close_event.ignore()
+
+    def keyPressEvent(self, q_key_event):
+        if q_key_event.key() == Qt.Key_Escape:
+            self.hide()
+
+    def on_filter_changed(self, text):
+        self.listViewSelect.model().set_filter(text)
+        self.pushButtonStart.setEnabled(False)
+
+    def on_start_play(self):
+        indexes = sorted(self.listViewSelect.selectionModel().selectedIndexes(), key=lambda index: index.row())
+        if indexes:
+            self.on_play_selected.emit([index.data(Qt.UserRole) for index in indexes])
+            self.hide()
+
+    def item_clicked(self):
+        self.pushButtonStart.setEnabled(self.listViewSelect.selectionModel().hasSelection())
+
+    def item_dbl_clicked(self):
+        self.on_play_selected.emit([self.listViewSelect.currentIndex().data(Qt.UserRole)])
+        self.hide()